@@ -1,8 +1,14 @@
+import time
+
+# Measured from here: everything this module imports counts toward startup
+_import_started = time.perf_counter()
+
 import os
 import re
-import json
+import asyncio
+import importlib
+import uuid
 from typing import Any, Dict, List, Optional
-from urllib.parse import urlparse
 import sys
 from pathlib import Path
 
@@ -10,20 +16,109 @@ from pathlib import Path
 backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
-import requests
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from dotenv import load_dotenv
-from models.headphone import UserRequest, UseCase
-from scoring.strategies import get_strategy
+from models.weight_profile import WeightProfile
+from models.headphone import (
+    CatalogRankRequest,
+    CatalogUpsertRequest,
+    SessionCreateRequest,
+    SessionItemsRequest,
+    SimilarRequest,
+    SweepRequest,
+    UserRequest,
+    UseCase,
+)
+from scoring.strategies import STRATEGIES, get_strategy
+from scoring.catalog import Catalog
+from scoring.similar import SimilarityIndex
+from scoring.sessions import SessionLimitError, SessionStore
+from scoring.weight_profiles import ProfileError, known_use_cases, profile_registry
+from scoring.scoring_logic import (
+    DRIVER_SIZE_RANGES,
+    SPEC_RANGES,
+    WATER_RESISTANCE_SCORES,
+    evaluate_headphones,
+    normalize_specs,
+    score_headphone_for_use_case,
+)
+from scoring.sensitivity import (
+    break_even_points,
+    possible_winners,
+    rank_for_mix,
+    simplex_grid_size,
+    summarize_regions,
+    sweep_winners,
+)
+from pipeline import metrics
+from pipeline.html_cleaner import clean_html
+from pipeline.parsing import (
+    HEADPHONE_KEYWORDS,
+    extract_from_feature_bullets,
+    extract_from_specifications,
+    is_headphone_related_product,
+    map_llm_response_to_headphone,
+    parse_hours_from_text,
+    parse_mic_count,
+    parse_number_from_text,
+    parse_price_value,
+    prepare_llm_result,
+    water_resistance_to_float,
+)
+from scoring.warmup import warm_scoring
+
+# The link pipeline (requests, page store, OpenRouter client, CPU pool) is only
+# needed for product links, so it is imported on first use rather than on every
+# cold start. Its names can still be imported from this module.
+LAZY_PIPELINE_EXPORTS = {
+    "expand_url": "pipeline.fetch",
+    "fetch_cleaned_page": "pipeline.fetch",
+    "fetch_cleaned_pages": "pipeline.fetch",
+    "resolve_product_url": "pipeline.fetch",
+    "extract_specs_cached": "pipeline.llm",
+    "extract_specs_with_llm": "pipeline.llm",
+    "batch_extraction_enabled": "pipeline.llm_batch",
+    "extract_specs_batch_cached": "pipeline.llm_batch",
+    "run_batch": "pipeline.workers",
+    "run_io": "pipeline.workers",
+    "shutdown_pools": "pipeline.workers",
+    "start_pools": "pipeline.workers",
+}
 
-# Load environment variables from .env file in backend directory
+def __getattr__(name):
+    module_name = LAZY_PIPELINE_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name), name)
+
+def preload_pipeline():
+    """Import the link pipeline and start its worker pools ahead of the first link request."""
+    started = time.perf_counter()
+    for module_name in sorted(set(LAZY_PIPELINE_EXPORTS.values())):
+        importlib.import_module(module_name)
+    metrics.set_gauge("startup.pipeline_import_seconds", round(time.perf_counter() - started, 4))
+    importlib.import_module("pipeline.workers").start_pools()
+
+# Load environment variables from .env file in backend directory; deployments
+# configured through the environment skip importing python-dotenv
 env_file = backend_dir / ".env"
-load_dotenv(env_file)
+if env_file.exists():
+    from dotenv import load_dotenv
+    load_dotenv(env_file)
 
 app = FastAPI()
 
+# In-memory catalog for /catalog ranking; Pareto layers deeper than this are
+# not tracked, so /catalog/rank scores everything for larger top_k
+catalog = Catalog(depth=int(os.getenv("CATALOG_FRONTIER_DEPTH") or 10))
+# Nearest-neighbour index for /similar, updated with every catalog change
+similar_index = SimilarityIndex()
+catalog.add_listener(similar_index.update)
+
+# Server-side comparison sessions (memory-bounded, idle sessions expire)
+comparison_sessions = SessionStore()
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -38,13 +133,35 @@ app.add_middleware(
 async def health_check():
     return {"status": "ok", "message": "Backend is running"}
 
-def expand_url(short_url: str) -> str:
-    try:
-        response = requests.get(short_url, allow_redirects=False, timeout=10)
-        location = response.headers.get("Location")
-        return location or short_url
-    except requests.RequestException:
-        return short_url
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
+@app.on_event("startup")
+async def warm_up():
+    """
+    Warm scoring before the first request, then import the link pipeline in
+    the background (PRELOAD_PIPELINE=false to skip) so a cold start answers
+    the wake-up ping without waiting for it.
+    """
+    started = time.perf_counter()
+    warm_scoring()
+    metrics.set_gauge("startup.warm_seconds", round(time.perf_counter() - started, 4))
+    if (os.getenv("PRELOAD_PIPELINE") or "true").strip().lower() in ("1", "true", "yes"):
+        asyncio.get_running_loop().run_in_executor(None, preload_pipeline)
+
+@app.on_event("shutdown")
+async def stop_workers():
+    # The pools only exist once the link pipeline has been loaded
+    workers = sys.modules.get("pipeline.workers")
+    if workers is not None:
+        workers.shutdown_pools()
+
+ASIN_PATTERNS = [
+    re.compile(r"/dp/([A-Z0-9]{10})", re.IGNORECASE),
+    re.compile(r"/gp/product/([A-Z0-9]{10})", re.IGNORECASE),
+    re.compile(r"/product/([A-Z0-9]{10})", re.IGNORECASE),
+]
 
 def extract_asin(input_value: str) -> str:
     if not input_value:
@@ -55,505 +172,204 @@ def extract_asin(input_value: str) -> str:
     if len(trimmed) == 10 and "http" not in trimmed:
         return trimmed
 
-    patterns = [
-        r"/dp/([A-Z0-9]{10})",
-        r"/gp/product/([A-Z0-9]{10})",
-        r"/product/([A-Z0-9]{10})",
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, trimmed, flags=re.IGNORECASE)
+    for pattern in ASIN_PATTERNS:
+        match = pattern.search(trimmed)
         if match:
             return match.group(1)
 
     return ""
 
-def fetch_html_from_url(url: str) -> Optional[str]:
-    """Fetch HTML content from a product URL."""
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        return response.text
-    except requests.RequestException as e:
-        print(f"Error fetching URL {url}: {e}")
-        return None
-
-def clean_html(html: str) -> str:
-    """Clean HTML by removing scripts, styles, and extra whitespace."""
-    # Remove script and style tags
-    html = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
-    html = re.sub(r'<style[^>]*>.*?</style>', '', html, flags=re.DOTALL | re.IGNORECASE)
-    # Remove HTML tags but keep text
-    html = re.sub(r'<[^>]+>', ' ', html)
-    # Remove extra whitespace
-    html = re.sub(r'\s+', ' ', html)
-    return html.strip()[:10000]  # Limit to first 10k characters
-
-
-HEADPHONE_KEYWORDS = [
-    "headphone", "headphones", "earbud", "earbuds", "earphone", "earphones",
-    "over-ear", "on-ear", "neckband", "tws", "iem", "in-ear"
-]
-
-
-def is_headphone_related_product(llm_data: Dict[str, Any]) -> bool:
-    """Best-effort check to confirm extracted product is headphone-related."""
-    name = str(llm_data.get("name") or "").lower()
-    device_type = str(llm_data.get("device_type") or "").lower()
-    combined = f"{name} {device_type}"
-
-    if any(keyword in combined for keyword in HEADPHONE_KEYWORDS):
-        return True
-
-    valid_type_fragments = ["wireless earbuds", "wired earbuds", "over-ear", "neckband", "on-ear", "headphone"]
-    return any(fragment in device_type for fragment in valid_type_fragments)
-
-def extract_specs_with_llm(html_content: str, product_url: str, model: str, api_key: str) -> Optional[Dict[str, Any]]:
-    """
-    Use OpenRouter LLM to extract headphone specs from HTML content.
-    Args:
-        html_content: Cleaned HTML text
-        product_url: URL for context
-        model: Model name (e.g., "openrouter/auto", "mistralai/mistral-small", etc.)
-        api_key: OpenRouter API key
-    Returns: Dictionary with extracted specs or None on failure
-    """
-    if not api_key:
-        print("No API key provided")
-        return None
-    
-    try:
-        prompt = f"""Extract headphone specifications from this product page HTML. Return ONLY a JSON object with these exact fields:
-{{
-  "name": "product name",
-  "price": numeric price in INR (extract from page, convert USD to INR if needed, use 83.0 exchange rate),
-  "battery_life": numeric hours (null if not applicable or wired),
-  "latency": numeric milliseconds (null if not available),
-  "num_mics": numeric count (0 if not mentioned),
-  "device_type": one of ["Wireless Earbuds", "Wired Earbuds", "Over-Ear Wireless", "Over-Ear Wired", "Neckband"],
-  "water_resistance": string rating like "IPX4" or "IPX5" (use "None" if not found),
-  "driver_size": numeric millimeters (null if not available)
-}}
-
-Extract ALL available information. Use sensible defaults only when truly unavailable.
-Return ONLY valid JSON, no additional text.
-
-HTML Content:
-{html_content}
-
-URL: {product_url}
-"""
-        
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "HTTP-Referer": "https://frequency-labs.com",
-                "X-Title": "Frequency Labs",
-            },
-            json={
-                "model": model,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.1,  # Low temperature for structured output
-            },
-            timeout=30,
+def check_use_case_names(names):
+    """Reject use cases that are neither built in nor registered profiles."""
+    known = known_use_cases()
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown use case(s): {', '.join(unknown)}. Known: {', '.join(known)}."
         )
-        
-        response.raise_for_status()
-        result = response.json()
-        
-        if "error" in result:
-            error_msg = result["error"].get("message", str(result["error"]))
-            print(f"OpenRouter error: {error_msg}")
-            
-            if "quota" in error_msg.lower() or "rate" in error_msg.lower():
-                raise HTTPException(status_code=429, detail=f"API quota/rate limit: {error_msg}")
-            if "auth" in error_msg.lower() or "invalid" in error_msg.lower():
-                raise HTTPException(status_code=401, detail=f"API authentication failed: {error_msg}")
-            
-            return None
-        
-        # Extract text from response
-        if "choices" not in result or not result["choices"]:
-            print("No choices in OpenRouter response")
-            return None
-        
-        message = result["choices"][0].get("message", {})
-        response_text = message.get("content", "").strip()
-        
-        if not response_text:
-            print("Empty response from OpenRouter")
-            return None
-        
-        # Extract JSON from response
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-            parsed = json.loads(json_str)
-            return parsed
-        
-        print(f"Could not extract JSON from response: {response_text[:200]}")
-        return None
-        
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP Error: {e.response.status_code} - {e.response.text}")
-        return None
-    except Exception as e:
-        print(f"Error extracting specs: {type(e).__name__}: {str(e)}")
-        return None
-
-
-def parse_number_from_text(text: str) -> Optional[float]:
-    if not text:
-        return None
-    match = re.search(r"(\d+(?:\.\d+)?)", text)
-    if not match:
-        return None
-    return float(match.group(1))
-
-def parse_price_value(value: Any) -> Optional[float]:
-    if value is None:
-        return None
-    if isinstance(value, (int, float)):
-        return float(value)
-    if isinstance(value, str):
-        cleaned = value.replace(",", "").strip()
-        try:
-            return float(cleaned)
-        except ValueError:
-            return parse_number_from_text(cleaned)
-    return None
-
-def parse_hours_from_text(text: str) -> Optional[float]:
-    if not text:
-        return None
-    match = re.search(r"(\d+(?:\.\d+)?)\s*(hour|hours|hr|hrs)", text, flags=re.IGNORECASE)
-    if match:
-        return float(match.group(1))
-    return None
-
-def parse_mic_count(text: str) -> Optional[int]:
-    if not text:
-        return None
-    match = re.search(r"(\d+)\s*(mic|mics|microphone|microphones)", text, flags=re.IGNORECASE)
-    if match:
-        return int(match.group(1))
-    return None
-
-def extract_from_specifications(specs: List[Dict[str, Any]], name_patterns: List[str]) -> Optional[str]:
-    for spec in specs or []:
-        name = str(spec.get("name", "")).lower()
-        if any(pattern in name for pattern in name_patterns):
-            return str(spec.get("value", "")).strip()
-    return None
-
-
-def extract_from_specifications(specs: List[Dict[str, Any]], name_patterns: List[str]) -> Optional[str]:
-    """Placeholder for compatibility - not used with LLM extraction."""
-    for spec in specs or []:
-        name = str(spec.get("name", "")).lower()
-        if any(pattern in name for pattern in name_patterns):
-            return str(spec.get("value", "")).strip()
-    return None
-
-def extract_from_feature_bullets(bullets: List[str], pattern: str) -> Optional[str]:
-    """Placeholder for compatibility - not used with LLM extraction."""
-    for bullet in bullets or []:
-        if re.search(pattern, bullet, flags=re.IGNORECASE):
-            return bullet
-    return None
-
-def water_resistance_to_float(rating: str) -> float:
-    """Convert IPX rating string to numeric score for Headphone model"""
-    mapping = {
-        'None': 0.0,
-        'IPX0': 0.0,
-        'IPX1': 0.1,
-        'IPX2': 0.2,
-        'IPX3': 0.3,
-        'IPX4': 0.4,
-        'IPX5': 0.5,
-        'IPX6': 0.6,
-        'IPX7': 0.7,
-        'IPX8': 0.8,
-        'IPX9': 0.9,
-    }
-    return mapping.get(rating, 0.4)
 
-def map_llm_response_to_headphone(llm_data: Dict[str, Any]) -> tuple:
+@app.post("/evaluate")
+async def evaluate(request: UserRequest):
     """
-    Map LLM extracted data to headphone input format.
-    Returns: (headphone_dict, missing_fields_list)
+    Evaluate headphones across multiple use cases.
+    Each use case is scored independently, then blended by percentage.
     """
-    missing_fields = []
-    
-    # Extract each field with validation
-    name = llm_data.get("name") or "Unknown Headphone"
-    
-    price = parse_price_value(llm_data.get("price"))
-    if price is None or price <= 0:
-        price = 5000
-        missing_fields.append("price")
-    
-    battery_life = parse_price_value(llm_data.get("battery_life"))
-    if battery_life is None:
-        missing_fields.append("battery_life")
-    
-    latency = parse_price_value(llm_data.get("latency"))
-    if latency is None:
-        missing_fields.append("latency")
-    
-    num_mics = int(parse_price_value(llm_data.get("num_mics") or 0))
-    if num_mics == 0:
-        missing_fields.append("num_mics")
-    
-    device_type = llm_data.get("device_type") or "Wireless Earbuds"
-    
-    water_resistance_str = llm_data.get("water_resistance") or "None"
-    water_resistance = water_resistance_to_float(water_resistance_str)
-    if water_resistance_str == "None":
-        missing_fields.append("water_resistance")
-    
-    driver_size = parse_price_value(llm_data.get("driver_size"))
-    if driver_size is None:
-        missing_fields.append("driver_size")
-    
-    return {
-        "name": name,
-        "price": price,
-        "battery_life": battery_life,
-        "latency": latency,
-        "num_mics": num_mics,
-        "device_type": device_type,
-        "water_resistance": water_resistance,
-        "driver_size": driver_size,
-    }, missing_fields
-
-def evaluate_headphones(headphones_data: List[Dict[str, Any]], use_cases: List[UseCase]):
-    ranked = []
-    for idx, headphone in enumerate(headphones_data):
-        use_case_scores = {}
-        all_contributions = {}
-        final_score = 0
-
-        for use_case in use_cases:
-            uc_score, contributions = score_headphone_for_use_case(
-                headphone,
-                use_case.name
-            )
-
-            weighted_score = uc_score * (use_case.percentage / 100)
-            final_score += weighted_score
-
-            use_case_scores[use_case.name] = round(uc_score, 3)
-
-            for spec, contrib in contributions.items():
-                weighted_contrib = contrib * (use_case.percentage / 100)
-                all_contributions[spec] = all_contributions.get(spec, 0) + weighted_contrib
-
-        all_contributions = {k: round(v, 4) for k, v in all_contributions.items()}
+    check_use_case_names(uc.name for uc in request.use_cases)
+    headphones_data = [h.dict() for h in request.headphones]
+    return evaluate_headphones(headphones_data, request.use_cases)
 
-        price = headphone.get('price', 1)
-        if price is None or price <= 0:
-            price = 1
-        value_score = (final_score / price) * 10000
+# Upper bounds for a single /sweep request: grid size, headphones (dominance
+# check is quadratic) and mixes × possible winners (the sweep itself)
+MAX_SWEEP_MIXES = 50000
+MAX_SWEEP_HEADPHONES = 1000
+MAX_SWEEP_WORK = 2_000_000
 
-        ranked.append({
-            "model": headphone.get('name') or f"Headphone {idx + 1}",
-            "score": round(final_score, 3),
-            "value_score": round(value_score, 3),
-            "price": price,
-            "contributions": all_contributions,
-            "use_case_scores": use_case_scores,
-            "details": headphone
-        })
+@app.post("/sweep")
+def sweep(request: SweepRequest):
+    """
+    Sweep use-case mixes over a percentage grid.
+    Per-use-case scores are computed once; every mix is then ranked from that
+    matrix (the blend is linear). Returns the regions where each headphone
+    ranks first and break-even percentages against the base-mix leader.
+    A plain function, so the CPU-bound sweep runs in the threadpool.
+    """
+    if not request.headphones or not request.use_cases:
+        raise HTTPException(status_code=400, detail="At least one headphone and one use case are required.")
+    if len(request.headphones) > MAX_SWEEP_HEADPHONES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_SWEEP_HEADPHONES} headphones can be swept at once."
+        )
 
-    ranked.sort(key=lambda x: x['score'], reverse=True)
-    value_ranked = sorted(ranked, key=lambda x: x['value_score'], reverse=True)
+    use_case_names = [uc.name for uc in request.use_cases]
+    check_use_case_names(use_case_names)
+    mix_count = simplex_grid_size(len(use_case_names), request.step)
+    if mix_count > MAX_SWEEP_MIXES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Grid has {mix_count} mixes (max {MAX_SWEEP_MIXES}); use a larger step."
+        )
 
-    use_case_percentages = [
-        f"{uc.name.replace('_', ' ').title()} ({uc.percentage}%)"
-        for uc in use_cases
+    headphones_data = [h.dict() for h in request.headphones]
+    names = [h.get('name') or f"Headphone {idx + 1}" for idx, h in enumerate(headphones_data)]
+    score_matrix = [
+        [score_headphone_for_use_case(headphone, name)[0] for name in use_case_names]
+        for headphone in headphones_data
     ]
 
-    return {
-        "ranked_headphones": ranked,
-        "value_ranked_headphones": value_ranked,
-        "explanation": {
-            "reasoning": f"Headphones ranked for: {', '.join(use_case_percentages)}. "
-                        f"Performance ranking shows best specs for your use cases. "
-                        f"Value ranking shows best performance per rupee spent."
-        }
+    candidates = possible_winners(score_matrix)
+    if mix_count * len(candidates) > MAX_SWEEP_WORK:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"{mix_count} mixes x {len(candidates)} possible winners exceeds "
+                f"{MAX_SWEEP_WORK}; use a larger step or fewer headphones."
+            )
+        )
+    grid = sweep_winners(score_matrix, len(use_case_names), request.step, candidates)
+
+    base_mix = [uc.percentage for uc in request.use_cases]
+    base_order = rank_for_mix(score_matrix, base_mix)
+    leader = base_order[0]
+    challengers = sorted({winner for _, winner in grid} | set(base_order[1:2]))
+
+    result = {
+        "use_cases": use_case_names,
+        "step": request.step,
+        "mix_count": len(grid),
+        "use_case_scores": {
+            names[idx]: {name: round(score, 3) for name, score in zip(use_case_names, scores)}
+            for idx, scores in enumerate(score_matrix)
+        },
+        "regions": summarize_regions(grid, names, use_case_names),
+        "base_mix": {
+            "percentages": dict(zip(use_case_names, base_mix)),
+            "winner": names[leader],
+            "runner_up": names[base_order[1]] if len(base_order) > 1 else None,
+        },
+        "break_even": break_even_points(score_matrix, names, use_case_names, leader, challengers, base_mix),
     }
-
-# Water resistance rating scores
-WATER_RESISTANCE_SCORES = {
-    'IPX0': 0.0,
-    'IPX1': 0.1,
-    'IPX2': 0.2,
-    'IPX3': 0.3,
-    'IPX4': 0.4,
-    'IPX5': 0.5,
-    'IPX6': 0.6,
-    'IPX7': 0.7,
-    'IPX8': 0.8,
-    'IPX9': 0.9,
-    'None': 0.0,
-}
-
-# Normalization ranges for each spec
-SPEC_RANGES = {
-    'latency': (0, 200, True),      # Lower is better
-    'num_mics': (0, 16, False),     # More is better
-    'battery_life': (0, 50, False),
-    'water_resistance': (0, 1, False),
-    'price': (0, 20000, True),      # Lower is better (INR)
-    'device_type': (0, 1, False),   # Handled by strategy
-}
-
-# Driver size ranges by device type
-DRIVER_SIZE_RANGES = {
-    'earbuds': (6, 15),       # Earbuds: 6mm-15mm
-    'over-ear': (30, 53),     # Over-ear: 30mm-53mm
-    'wireless': (30, 53),     # Wireless (typically over-ear): 30mm-53mm
-    'wired': (30, 53),        # Wired (typically over-ear): 30mm-53mm
-    'neckband': (6, 15),      # Neckband (earbud-style): 6mm-15mm
-}
-
-def normalize_specs(headphone_dict):
-    """Normalize all specs to 0-1 range"""
-    normalized = {}
-    device_type = headphone_dict.get('device_type', '').lower()
-    is_wired = 'wired' in device_type
-    
-    for spec, (min_val, max_val, inverse) in SPEC_RANGES.items():
-        value = headphone_dict.get(spec)
-        
-        # Skip device_type - it's handled by strategy adjustments
-        if spec == 'device_type':
-            normalized[spec] = 0.5  # Neutral default
-            continue
-        
-        # Handle water_resistance (now a float from map_product_to_headphone)
-        if spec == 'water_resistance':
-            if isinstance(value, str):
-                # Fallback: convert string to float if needed
-                normalized[spec] = WATER_RESISTANCE_SCORES.get(value, 0.4)
-            elif isinstance(value, (int, float)):
-                # Value is already a float (0.0-1.0 range), use it directly
-                normalized[spec] = float(value)
-            else:
-                normalized[spec] = 0.5
-            continue
-        
-        # Coerce numeric specs from strings
-        if spec in ('price', 'battery_life', 'latency'):
-            value = parse_price_value(value)
-        if spec == 'num_mics':
-            value = int(parse_price_value(value) or 0)
-        
-        # Special handling for wired devices
-        if is_wired:
-            if spec == 'latency':
-                # Wired headphones have zero latency - perfect score
-                normalized[spec] = 1.0
-                continue
-            elif spec == 'battery_life':
-                # Wired headphones don't need battery - neutral score (not a penalty)
-                normalized[spec] = 0.75  # Slightly positive since no battery means always-on
-                continue
-        
-        if value is None:
-            normalized[spec] = 0.5
-            continue
-            
-        # Normalize to 0-1
-        if min_val == max_val:
-            norm_value = 0.5
-        else:
-            norm_value = (value - min_val) / (max_val - min_val)
-            norm_value = max(0, min(1, norm_value))  # Clamp to 0-1
-        
-        # Invert if lower is better
-        if inverse:
-            norm_value = 1 - norm_value
-            
-        normalized[spec] = norm_value
-    
-    # Handle driver_size separately based on device_type
-    driver_size = headphone_dict.get('driver_size')
-    device_type = headphone_dict.get('device_type', '').lower()
-    
-    if driver_size is not None:
-        # Get appropriate range for this device type
-        min_driver, max_driver = DRIVER_SIZE_RANGES.get(device_type, (20, 50))
-        
-        # Normalize within appropriate range
-        if max_driver == min_driver:
-            normalized['driver_size'] = 0.5
-        else:
-            norm_value = (driver_size - min_driver) / (max_driver - min_driver)
-            normalized['driver_size'] = max(0, min(1, norm_value))
-    else:
-        normalized['driver_size'] = 0.5
-    
-    return normalized
-
-def score_headphone_for_use_case(headphone_dict, use_case_name):
+    if request.include_grid:
+        result["grid"] = [
+            {"mix": dict(zip(use_case_names, mix)), "winner": names[winner]}
+            for mix, winner in grid
+        ]
+    return result
+
+# Catalog handlers are plain functions: updates cost O(catalog size) per
+# item, so they run in the threadpool (serialized by catalog.lock) instead of
+# blocking the event loop
+
+@app.get("/catalog")
+def get_catalog():
+    with catalog.lock:
+        stats = catalog.stats()
+        stats["similar_index"] = similar_index.stats()
+    return stats
+
+@app.post("/catalog/items")
+def upsert_catalog_items(request: CatalogUpsertRequest):
+    """Add or replace catalog items; Pareto layers are updated incrementally."""
+    ids = [item.id or uuid.uuid4().hex for item in request.items]
+    catalog.upsert_many(
+        (item_id, item.dict(exclude={'id'})) for item_id, item in zip(ids, request.items)
+    )
+    return {"ids": ids, "size": len(catalog)}
+
+@app.delete("/catalog/items/{item_id}")
+def delete_catalog_item(item_id: str):
+    if not catalog.remove(item_id):
+        raise HTTPException(status_code=404, detail=f"Catalog item {item_id} not found.")
+    return {"id": item_id, "size": len(catalog)}
+
+@app.post("/catalog/rank")
+def rank_catalog(request: CatalogRankRequest):
     """
-    Score a single headphone for a specific use case.
-    Returns: (score, contributions_dict)
-    
-    Note: All specs are normalized and visible to strategies,
-    but only specs in strategy.weights contribute to final score.
-    This allows strategies to adjust based on any spec (e.g., penalize expensive options).
+    Rank the catalog for a use-case mix, returning the top_k of each ranking.
+    Only the top Pareto layers are scored; headphones dominated by top_k
+    others on every use-case score cannot reach the top_k.
     """
-    strategy = get_strategy(use_case_name)
-    
-    # Step 1: Normalize ALL specs (strategies can see everything)
-    normalized_scores = normalize_specs(headphone_dict)
-    
-    # Step 2: Apply strategy-specific adjustments
-    # Strategy can use any spec to make decisions, even if not weighted
-    adjusted_scores = strategy.adjust_scores(normalized_scores, headphone_dict)
-    
-    # Step 3: Calculate weighted sum - ONLY specs in strategy.weights contribute
-    score = 0
-    contributions = {}
-    
-    for spec, weight in strategy.weights.items():
-        spec_score = adjusted_scores.get(spec, 0)
-        contribution = spec_score * weight
-        score += contribution
-        contributions[spec] = round(contribution, 4)
-    
-    return score, contributions
+    check_use_case_names(uc.name for uc in request.use_cases)
+    return catalog.rank(request.use_cases, request.top_k, request.layers, request.prune)
 
-@app.post("/evaluate")
-async def evaluate(request: UserRequest):
+@app.post("/similar")
+def similar(request: SimilarRequest):
     """
-    Evaluate headphones across multiple use cases.
-    Each use case is scored independently, then blended by percentage.
+    Catalog headphones with the most similar specs to a catalog item (id) or
+    a given headphone, optionally cheaper or meeting minimum use-case scores.
     """
-    headphones_data = [h.dict() for h in request.headphones]
-    return evaluate_headphones(headphones_data, request.use_cases)
+    check_use_case_names(request.min_scores)
+    with catalog.lock:
+        if request.id is not None:
+            headphone = catalog.items.get(request.id)
+            if headphone is None:
+                raise HTTPException(status_code=404, detail=f"Catalog item {request.id} not found.")
+        elif request.headphone is not None:
+            headphone = request.headphone.dict()
+        else:
+            raise HTTPException(status_code=400, detail="Provide a catalog item id or a headphone.")
+
+        below_price = headphone.get('price') if request.cheaper else None
+        neighbours = similar_index.nearest(
+            headphone,
+            request.k,
+            same_device_type=request.same_device_type,
+            max_price=request.max_price,
+            below_price=below_price,
+            min_scores=request.min_scores,
+            exclude=[request.id] if request.id is not None else [],
+        )
+        items = [(distance, item_id, catalog.items[item_id]) for distance, item_id in neighbours]
+
+    results = []
+    for distance, item_id, item in items:
+        results.append({
+            "id": item_id,
+            "model": item.get('name'),
+            "price": item.get('price'),
+            "device_type": item.get('device_type'),
+            "distance": round(distance, 4),
+            "use_case_scores": {
+                name: round(score_headphone_for_use_case(item, name)[0], 3)
+                for name in request.min_scores
+            },
+            "details": item,
+        })
+    return {
+        "query": {"id": request.id, "model": headphone.get('name'), "price": headphone.get('price')},
+        "results": results,
+    }
 
 class AmazonEvaluateRequest(BaseModel):
     amazon_urls: List[str]
     use_cases: List[UseCase]
 
-@app.post("/evaluate-amazon")
-async def evaluate_amazon(request: AmazonEvaluateRequest):
-    """
-    Evaluate headphones from Amazon/Flipkart URLs using OpenRouter LLM for data extraction.
-    """
+def get_llm_config():
+    """(api_key, model, fallback_model) for OpenRouter, or a 500 if unconfigured."""
     llm_api_key = os.getenv("OPENROUTER_API_KEY")
     llm_model = os.getenv("OPENROUTER_MODEL")
+    llm_fallback_model = os.getenv("OPENROUTER_FALLBACK_MODEL")
     
     if not llm_api_key:
         raise HTTPException(
@@ -566,69 +382,118 @@ async def evaluate_amazon(request: AmazonEvaluateRequest):
             status_code=500,
             detail="OPENROUTER_MODEL environment variable is not configured."
         )
+    return llm_api_key, llm_model, llm_fallback_model
 
-    try:
-        headphones_data = []
-        all_missing = {}
-        invalid_products = []
+async def extract_products_from_links(links: List[str]):
+    """
+    Fetch, clean and LLM-extract product links.
+    Returns ([(url, headphone_dict)], invalid_products, missing specs by name).
+    """
+    from pipeline.fetch import fetch_cleaned_pages, resolve_product_url
+    from pipeline.llm import extract_specs_cached
+    from pipeline.llm_batch import batch_extraction_enabled, extract_specs_batch_cached
+    from pipeline.workers import run_batch, run_io
+
+    llm_api_key, llm_model, llm_fallback_model = get_llm_config()
+    products = []
+    all_missing = {}
+    invalid_products = []
+    
+    # Expand short URLs (network-bound, concurrent on the I/O pool)
+    expanded_links = await asyncio.gather(*(
+        run_io(resolve_product_url, link) for link in links
+    ))
+
+    # Fetch pages on the I/O pool and clean them on the CPU pool, window by
+    # window, until the cleaner has enough text
+    pages = await fetch_cleaned_pages(expanded_links)
+
+    # Use LLM to extract specs (network-bound; reused when the cleaned
+    # text is unchanged). Batched mode packs several products per request.
+    fetched = [idx for idx, page in enumerate(pages) if page]
+    if batch_extraction_enabled():
+        extracted = await run_io(
+            extract_specs_batch_cached,
+            [(pages[idx][0], expanded_links[idx]) for idx in fetched],
+            llm_model,
+            llm_api_key,
+            llm_fallback_model,
+        )
+    else:
+        extracted = await asyncio.gather(*(
+            run_io(
+                extract_specs_cached,
+                pages[idx][0],
+                expanded_links[idx],
+                llm_model,
+                llm_api_key,
+                llm_fallback_model,
+            )
+            for idx in fetched
+        ))
+    llm_results = [None] * len(pages)
+    for idx, llm_data in zip(fetched, extracted):
+        llm_results[idx] = llm_data
+
+    # Validate and map LLM responses to headphone format in one batch
+    prepared = await run_batch(prepare_llm_result, llm_results, batch_size=len(llm_results))
+
+    for expanded_link, page, item in zip(expanded_links, pages, prepared):
+        if not page:
+            invalid_products.append({
+                "url": expanded_link,
+                "name": "Unknown Product",
+                "reason": "Failed to fetch product page"
+            })
+            continue
+        
+        if item is None:
+            invalid_products.append({
+                "url": expanded_link,
+                "name": "Unknown Product",
+                "reason": "Failed to extract product data"
+            })
+            continue
         
-        for link in request.amazon_urls:
-            # Expand short URLs
-            parsed = urlparse(link)
-            hostname = (parsed.hostname or "").lower()
-            expanded_link = link
-
-            if hostname.startswith("amzn.") or hostname.endswith("amzn.in"):
-                expanded_link = expand_url(link)
-
-            # Fetch HTML from the URL
-            html_content = fetch_html_from_url(expanded_link)
-            if not html_content:
-                invalid_products.append({
-                    "url": expanded_link,
-                    "name": "Unknown Product",
-                    "reason": "Failed to fetch product page"
-                })
-                continue
-            
-            # Clean HTML
-            cleaned_html = clean_html(html_content)
-            
-            # Use LLM to extract specs
-            llm_data = extract_specs_with_llm(cleaned_html, expanded_link, llm_model, llm_api_key)
-            if not llm_data:
-                invalid_products.append({
-                    "url": expanded_link,
-                    "name": "Unknown Product",
-                    "reason": "Failed to extract product data"
-                })
-                continue
-            
-            # Validate headphone-related product
-            if not is_headphone_related_product(llm_data):
-                product_name = llm_data.get("name", "Unknown Product")
-                invalid_products.append({
-                    "url": expanded_link,
-                    "name": product_name,
-                    "reason": "Not a headphone or related audio-wearable product"
-                })
-                continue
-            
-            # Map LLM response to headphone format
-            headphone_dict, missing_fields = map_llm_response_to_headphone(llm_data)
-            headphones_data.append(headphone_dict)
-            if missing_fields:
-                all_missing[headphone_dict["name"]] = missing_fields
+        is_headphone, headphone_dict, missing_fields = item
+        if not is_headphone:
+            invalid_products.append({
+                "url": expanded_link,
+                "name": headphone_dict["name"],
+                "reason": "Not a headphone or related audio-wearable product"
+            })
+            continue
+        
+        products.append((expanded_link, headphone_dict))
+        if missing_fields:
+            all_missing[headphone_dict["name"]] = missing_fields
+
+    return products, invalid_products, all_missing
+
+def missing_specs_note(all_missing: Dict[str, List[str]]) -> str:
+    return (
+        f"Some specs were not available and used neutral defaults: "
+        f"{', '.join([k + ': ' + ', '.join(v) for k, v in all_missing.items()])}"
+    )
+
+@app.post("/evaluate-amazon")
+async def evaluate_amazon(request: AmazonEvaluateRequest):
+    """
+    Evaluate headphones from Amazon/Flipkart URLs using OpenRouter LLM for data extraction.
+    """
+    get_llm_config()
+    check_use_case_names(uc.name for uc in request.use_cases)
+
+    try:
+        products, invalid_products, all_missing = await extract_products_from_links(request.amazon_urls)
+        headphones_data = [headphone_dict for _, headphone_dict in products]
 
         result = evaluate_headphones(headphones_data, request.use_cases)
         result["invalid_products"] = invalid_products
         
         if all_missing:
             result["missing_specs"] = all_missing
-            result["explanation"]["note"] = (
-                f"Some specs were not available and used neutral defaults: "
-                f"{', '.join([k + ': ' + ', '.join(v) for k, v in all_missing.items()])}"
-            )
+            result["explanation"]["note"] = missing_specs_note(all_missing)
 
         if not headphones_data and invalid_products:
             result["explanation"]["note"] = (
@@ -645,6 +510,126 @@ async def evaluate_amazon(request: AmazonEvaluateRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
+def get_session_or_404(session_id: str):
+    session = comparison_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found or expired.")
+    return session
+
+async def extract_session_products(headphones, amazon_urls: List[str]):
+    """([(url, headphone_dict)], invalid_products, missing specs) for a session add."""
+    products = [(None, h.dict()) for h in headphones]
+    if not amazon_urls:
+        return products, [], {}
+    try:
+        extracted, invalid_products, all_missing = await extract_products_from_links(amazon_urls)
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+    return products + extracted, invalid_products, all_missing
+
+def merge_session_items(session, products, invalid_products, all_missing):
+    """Score only the new products and merge them into the session's rankings."""
+    try:
+        added = comparison_sessions.add_items(session, products)
+    except SessionLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    result = session.result()
+    result["added"] = added
+    result["invalid_products"] = invalid_products
+    if all_missing:
+        result["missing_specs"] = all_missing
+        result["explanation"]["note"] = missing_specs_note(all_missing)
+    return result
+
+def check_session_room(session, headphones, amazon_urls: List[str]):
+    """413 before any extraction if the products cannot fit in the session."""
+    try:
+        comparison_sessions.check_room(session, len(headphones) + len(amazon_urls))
+    except SessionLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+@app.post("/sessions")
+async def create_session(request: SessionCreateRequest):
+    """
+    Start a comparison session. Products added later are scored on their own
+    and merged into the stored rankings instead of re-scoring (and, for
+    links, re-scraping) everything.
+    """
+    check_use_case_names(uc.name for uc in request.use_cases)
+    check_session_room(None, request.headphones, request.amazon_urls)
+    if request.amazon_urls:
+        get_llm_config()
+    extracted = await extract_session_products(request.headphones, request.amazon_urls)
+
+    # Created only once extraction succeeded, so failures leave nothing behind
+    session = comparison_sessions.create(request.use_cases)
+    try:
+        return merge_session_items(session, *extracted)
+    except HTTPException:
+        comparison_sessions.delete(session.session_id)
+        raise
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    return get_session_or_404(session_id).result()
+
+@app.post("/sessions/{session_id}/items")
+async def add_to_session(session_id: str, request: SessionItemsRequest):
+    check_session_room(get_session_or_404(session_id), request.headphones, request.amazon_urls)
+    extracted = await extract_session_products(request.headphones, request.amazon_urls)
+    # The session may have expired while products were being extracted
+    return merge_session_items(get_session_or_404(session_id), *extracted)
+
+@app.delete("/sessions/{session_id}/items/{item_id}")
+async def remove_from_session(session_id: str, item_id: str):
+    session = get_session_or_404(session_id)
+    if not session.remove(item_id):
+        raise HTTPException(status_code=404, detail=f"Item {item_id} not found in session.")
+    comparison_sessions.enforce_budget()
+    return session.result()
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    if not comparison_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found or expired.")
+    return {"session_id": session_id, "deleted": True}
+
+@app.get("/profiles")
+async def list_profiles():
+    return {"built_in": list(STRATEGIES), "profiles": profile_registry.describe()}
+
+# Plain functions: the catalog's dominance vectors cover every known use case,
+# so a profile change rebuilds them (O(n²) in catalog size) in the threadpool,
+# holding the catalog lock so no update sees a half-changed registry
+
+@app.post("/profiles")
+def register_profile(profile: WeightProfile):
+    """
+    Register (or replace) a custom use case from weights and adjustment rules.
+    The profile is compiled once into a scoring kernel and can then be used
+    by name in any use-case mix.
+    """
+    with catalog.lock:
+        try:
+            digest = profile_registry.register(profile)
+        except ProfileError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        catalog.rebuild()
+    return {"name": profile.name, "digest": digest}
+
+@app.delete("/profiles/{name}")
+def delete_profile(name: str):
+    with catalog.lock:
+        if not profile_registry.unregister(name):
+            raise HTTPException(status_code=404, detail=f"Profile {name} not found.")
+        catalog.rebuild()
+    return {"name": name, "deleted": True}
+
 @app.post("/rank_headphones/")
 async def rank_headphones(request: UserRequest):
     # Implement ranking logic here
@@ -652,3 +637,5 @@ async def rank_headphones(request: UserRequest):
         "ranked_headphones": [],
         "explanation": {}
     }
+
+metrics.set_gauge("startup.import_seconds", round(time.perf_counter() - _import_started, 4))
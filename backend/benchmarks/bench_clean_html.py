@@ -0,0 +1,85 @@
+"""
+Benchmark clean_html() against the streaming cleaner on a synthetic
+Amazon-sized product page (inline scripts/styles up front, long body).
+
+Usage (from backend/):
+    python benchmarks/bench_clean_html.py [page_size_mb]
+"""
+import codecs
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pipeline.html_cleaner import StreamingHtmlCleaner, clean_html
+
+CHUNK_SIZE = 16 * 1024
+
+
+def build_page(size_mb: float) -> bytes:
+    head = (
+        "<html><head>"
+        + "<script type=\"text/javascript\">var a = {'k': [1, 2, 3]};</script>\n" * 400
+        + "<style>.a-section { margin: 0 auto; }</style>\n" * 200
+        + "</head><body>"
+    )
+    block = (
+        "<div class=\"a-row\"><span class=\"a-text-bold\">Battery Life</span>\n"
+        "  <span>30 Hours</span></div>\n"
+        "<script>window.ue && ue.count('x', 1);</script>\n"
+        "<li><span class=\"a-list-item\">ENC with 4 mics, IPX5, 10mm drivers</span></li>\n"
+    )
+    body_size = int(size_mb * 1024 * 1024) - len(head)
+    body = block * max(1, body_size // len(block))
+    return (head + body + "</body></html>").encode("utf-8")
+
+
+def run_full(page: bytes) -> str:
+    return clean_html(page.decode("utf-8"))
+
+
+def run_streaming(page: bytes) -> str:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    cleaner = StreamingHtmlCleaner()
+    for start in range(0, len(page), CHUNK_SIZE):
+        if cleaner.feed(decoder.decode(page[start:start + CHUNK_SIZE])):
+            break
+    else:
+        cleaner.feed(decoder.decode(b"", final=True))
+        cleaner.close()
+    return cleaner.text
+
+
+def measure(fn, page: bytes, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(page)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    page = build_page(size_mb)
+
+    full_text, full_time, full_peak = measure(run_full, page)
+    stream_text, stream_time, stream_peak = measure(run_streaming, page)
+
+    print(f"page size:      {len(page) / 1024 / 1024:.2f} MB")
+    print(f"output equal:   {full_text == stream_text}")
+    print(f"clean_html:     {full_time * 1000:8.2f} ms   peak {full_peak / 1024:10.1f} KiB")
+    print(f"streaming:      {stream_time * 1000:8.2f} ms   peak {stream_peak / 1024:10.1f} KiB")
+    if full_text != stream_text:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
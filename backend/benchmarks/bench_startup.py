@@ -0,0 +1,159 @@
+"""
+Cold-start benchmark: import time of api.routes, startup hook time and time
+to first response, each measured in a fresh interpreter (median of runs).
+
+Fails (exit 1) when a phase exceeds its budget or when the link pipeline
+(requests, pipeline.fetch/llm/llm_batch/workers, and dotenv unless there is
+a backend/.env) is imported before its first use.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [runs]
+
+Budgets in milliseconds can be overridden with STARTUP_BUDGET_IMPORT_MS,
+STARTUP_BUDGET_WARM_MS and STARTUP_BUDGET_FIRST_RESPONSE_MS.
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+DEFAULT_BUDGETS_MS = {
+    "import": 300,
+    "warm": 50,
+    "first_response": 350,
+}
+
+# Must not be imported until a link is evaluated
+LAZY_MODULES = [
+    "requests",
+    "dotenv",
+    "pipeline.fetch",
+    "pipeline.llm",
+    "pipeline.llm_batch",
+    "pipeline.workers",
+]
+
+EVALUATE_BODY = json.dumps({
+    "headphones": [
+        {"name": "A", "price": 1999, "battery_life": 30, "latency": 80, "num_mics": 4,
+         "device_type": "wireless", "water_resistance": 0.5, "driver_size": 10},
+        {"name": "B", "price": 999, "battery_life": None, "latency": 0, "num_mics": 1,
+         "device_type": "wired", "water_resistance": 0.0, "driver_size": 40},
+    ],
+    "use_cases": [{"name": "gaming", "percentage": 60}, {"name": "travel", "percentage": 40}],
+}).encode("utf-8")
+
+
+async def asgi_request(app, method: str, path: str, body: bytes = b"") -> int:
+    """Send one request straight to the ASGI app; returns the status code."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    sent = False
+    messages = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return next(m["status"] for m in messages if m["type"] == "http.response.start")
+
+
+def child() -> None:
+    """One cold start; prints phase timings as JSON."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    started = time.perf_counter()
+    from api.routes import app
+    imported = time.perf_counter()
+    eager = [name for name in LAZY_MODULES if name in sys.modules]
+    if (BACKEND_DIR / ".env").exists():
+        # A local .env is loaded at import time by design
+        eager = [name for name in eager if name != "dotenv"]
+
+    async def first_requests():
+        await app.router.startup()
+        warmed = time.perf_counter()
+        ping = await asgi_request(app, "GET", "/")
+        pinged = time.perf_counter()
+        evaluated = await asgi_request(app, "POST", "/evaluate", EVALUATE_BODY)
+        done = time.perf_counter()
+        return warmed, pinged, done, [ping, evaluated]
+
+    warmed, pinged, done, statuses = asyncio.run(first_requests())
+    print(json.dumps({
+        "import": (imported - started) * 1000,
+        "warm": (warmed - imported) * 1000,
+        "ping": (pinged - warmed) * 1000,
+        "evaluate": (done - pinged) * 1000,
+        "first_response": (pinged - started) * 1000,
+        "statuses": statuses,
+        "eager_modules": eager,
+    }))
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    env = dict(os.environ, PRELOAD_PIPELINE="false")
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child"],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    failures = []
+    for phase in ("import", "warm", "ping", "evaluate", "first_response"):
+        median = statistics.median(result[phase] for result in results)
+        budget = DEFAULT_BUDGETS_MS.get(phase)
+        if budget is not None:
+            budget = float(os.getenv(f"STARTUP_BUDGET_{phase.upper()}_MS") or budget)
+        line = f"{phase + ':':16}{median:8.1f} ms"
+        if budget is not None:
+            line += f"   budget {budget:.0f} ms"
+            if median > budget:
+                line += "   OVER"
+                failures.append(phase)
+        print(line)
+
+    eager = sorted({name for result in results for name in result["eager_modules"]})
+    statuses = sorted({status for result in results for status in result["statuses"]})
+    print(f"eager modules:  {', '.join(eager) or 'none'}")
+    print(f"statuses:       {statuses}")
+    if failures or eager or statuses != [200]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
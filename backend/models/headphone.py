@@ -1,5 +1,5 @@
 from pydantic import BaseModel, validator
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 class Headphone(BaseModel):
     price: Union[float, str]
@@ -42,3 +42,57 @@ class UseCase(BaseModel):
 class UserRequest(BaseModel):
     headphones: List[Headphone]
     use_cases: List[UseCase]
+
+class SweepRequest(BaseModel):
+    headphones: List[Headphone]
+    use_cases: List[UseCase]  # percentages are the base mix for break-even points
+    step: int = 5  # grid step in percentage points
+    include_grid: bool = False  # return the winner for every mix
+
+    @validator('step')
+    def check_step(cls, v):
+        if v <= 0 or 100 % v:
+            raise ValueError('step must be a positive divisor of 100')
+        return v
+
+class CatalogItem(Headphone):
+    id: Optional[str] = None  # generated when omitted; an existing id is replaced
+
+class CatalogUpsertRequest(BaseModel):
+    items: List[CatalogItem]
+
+class CatalogRankRequest(BaseModel):
+    use_cases: List[UseCase]
+    top_k: int = 10
+    layers: Optional[int] = None  # Pareto layers to score (default top_k, exact)
+    prune: bool = True  # False scores the whole catalog
+
+    @validator('top_k', 'layers')
+    def check_positive(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('must be positive')
+        return v
+
+class SimilarRequest(BaseModel):
+    id: Optional[str] = None  # catalog item to find alternatives for...
+    headphone: Optional[Headphone] = None  # ...or a headphone outside the catalog
+    k: int = 5
+    same_device_type: bool = True
+    max_price: Optional[float] = None
+    cheaper: bool = False  # only headphones cheaper than the query
+    min_scores: Dict[str, float] = {}  # minimum use-case score, e.g. {"gaming": 0.6}
+
+    @validator('k')
+    def check_k(cls, v):
+        if v <= 0:
+            raise ValueError('k must be positive')
+        return v
+
+class SessionCreateRequest(BaseModel):
+    use_cases: List[UseCase]
+    headphones: List[Headphone] = []
+    amazon_urls: List[str] = []
+
+class SessionItemsRequest(BaseModel):
+    headphones: List[Headphone] = []
+    amazon_urls: List[str] = []
@@ -0,0 +1,41 @@
+from pydantic import BaseModel, StrictStr, validator
+from typing import Dict, List, Literal, Optional, Union
+
+RuleOp = Literal['<', '<=', '>', '>=', '==', '!=', 'contains', 'not_contains', 'always']
+
+class AdjustmentRule(BaseModel):
+    """
+    Override one spec's normalized score when a raw spec matches.
+    Rules for the same spec are tried in order and the first match wins.
+    """
+    spec: str  # score to adjust
+    op: RuleOp
+    field: Optional[str] = None  # raw spec to test (defaults to spec)
+    value: Optional[Union[StrictStr, float]] = None  # strings stay strings for contains
+    set: Optional[float] = None  # replace the score...
+    multiply: Optional[float] = None  # ...or scale it
+    max: Optional[float] = None  # cap after scaling
+
+    @validator('multiply', always=True)
+    def check_action(cls, v, values):
+        if (v is None) == (values.get('set') is None):
+            raise ValueError('exactly one of set or multiply is required')
+        return v
+
+    @validator('value', always=True)
+    def check_value(cls, v, values):
+        if values.get('op') != 'always' and v is None:
+            raise ValueError('value is required for this op')
+        return v
+
+class WeightProfile(BaseModel):
+    name: str  # use case name to register the profile under
+    weights: Dict[str, float]
+    rules: List[AdjustmentRule] = []
+
+    @validator('name')
+    def check_name(cls, v):
+        v = v.strip()
+        if not v or not all(c.isalnum() or c in '_-' for c in v):
+            raise ValueError('name must be non-empty and use letters, digits, _ or -')
+        return v
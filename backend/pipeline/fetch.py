@@ -0,0 +1,206 @@
+"""
+Page fetching for the Amazon pipeline: short-URL expansion and streaming
+fetch + clean with conditional revalidation against the HTML store.
+
+A fetch reads the page a window at a time and stops once the cleaner's
+character budget is filled. fetch_cleaned_pages() does the reads on the I/O
+pool and the cleaning on the CPU pool (see pipeline/workers.py);
+fetch_cleaned_page() does both in the calling thread.
+"""
+import asyncio
+import codecs
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+
+from pipeline.html_cleaner import StreamingHtmlCleaner, feed_cleaner
+from pipeline.html_store import DEFAULT_MAX_BYTES as DEFAULT_HTML_STORE_MAX_BYTES, HtmlStore, content_hash
+from pipeline.workers import run_batch, run_io
+
+DEFAULT_HTML_STORE_DIR = Path(__file__).parent.parent / ".cache" / "html_store"
+
+_html_store: Optional[HtmlStore] = None
+
+
+def get_html_store() -> HtmlStore:
+    """Cleaned text and LLM results of fetched pages, keyed by content hash."""
+    global _html_store
+    if _html_store is None:
+        try:
+            max_bytes = int(os.getenv("HTML_STORE_MAX_BYTES") or DEFAULT_HTML_STORE_MAX_BYTES)
+        except ValueError:
+            max_bytes = DEFAULT_HTML_STORE_MAX_BYTES
+        _html_store = HtmlStore(os.getenv("HTML_STORE_DIR") or DEFAULT_HTML_STORE_DIR, max_bytes)
+    return _html_store
+
+
+def expand_url(short_url: str) -> str:
+    try:
+        response = requests.get(short_url, allow_redirects=False, timeout=10)
+        location = response.headers.get("Location")
+        return location or short_url
+    except requests.RequestException:
+        return short_url
+
+def resolve_product_url(link: str) -> str:
+    """Expand amzn.* short links; other URLs are returned unchanged."""
+    hostname = (urlparse(link).hostname or "").lower()
+    if hostname.startswith("amzn.") or hostname.endswith("amzn.in"):
+        return expand_url(link)
+    return link
+
+FETCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+FETCH_CHUNK_SIZE = 16 * 1024
+
+# Bytes read per cleaning step when cleaning runs on the CPU pool
+FETCH_WINDOW_SIZE = 128 * 1024
+
+
+class PageStream:
+    """An open product page response, read and decoded window by window."""
+
+    def __init__(self, url: str, response: requests.Response):
+        self.url = url
+        self.response = response
+        try:
+            self.decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        except LookupError:
+            # Charset Python doesn't know; decode as UTF-8 like response.text would
+            self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.chunks = response.iter_content(chunk_size=FETCH_CHUNK_SIZE)
+        self.consumed: List[str] = []
+
+    def read_window(self, window_size: int = FETCH_WINDOW_SIZE) -> Tuple[str, bool]:
+        """Decoded text of the next ~window_size bytes, and whether the body ended."""
+        parts = []
+        size = 0
+        at_end = True
+        for chunk in self.chunks:
+            parts.append(self.decoder.decode(chunk))
+            size += len(chunk)
+            if size >= window_size:
+                at_end = False
+                break
+        if at_end:
+            parts.append(self.decoder.decode(b"", final=True))
+        text = "".join(parts)
+        self.consumed.append(text)
+        return text, at_end
+
+    def close(self) -> None:
+        self.response.close()
+
+
+def open_page(url: str) -> Union[Tuple[str, str], PageStream, None]:
+    """
+    Start fetching a product page, revalidating against the HTML store.
+    Returns (cleaned_text, content_hash) when the stored copy is still valid
+    (304 Not Modified), an open PageStream to read and clean otherwise, or
+    None on failure.
+    """
+    store = get_html_store()
+    try:
+        entry = store.get_url_entry(url)
+        headers = dict(FETCH_HEADERS)
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = requests.get(url, headers=headers, timeout=15, stream=True)
+        if response.status_code == 304 and entry:
+            response.close()
+            cleaned = store.get_cleaned(entry["content_hash"])
+            if cleaned is not None:
+                return cleaned, entry["content_hash"]
+            # Stored text is gone - fall back to an unconditional fetch
+            response = requests.get(url, headers=FETCH_HEADERS, timeout=15, stream=True)
+        try:
+            response.raise_for_status()
+        except requests.RequestException:
+            response.close()
+            raise
+        return PageStream(url, response)
+    except requests.RequestException as e:
+        print(f"Error fetching URL {url}: {e}")
+        return None
+
+
+def finish_page(page: PageStream, cleaned: str) -> Tuple[str, str]:
+    """
+    Store a page's cleaned text under the hash of the consumed prefix of the
+    page (which fully determines it). Returns (cleaned_text, content_hash).
+    """
+    digest = content_hash("".join(page.consumed))
+    store = get_html_store()
+    try:
+        store.put_cleaned(digest, cleaned)
+        store.put_url_entry(
+            page.url,
+            digest,
+            etag=page.response.headers.get("ETag"),
+            last_modified=page.response.headers.get("Last-Modified"),
+        )
+    except OSError as e:
+        # Store is best-effort; never fail a fetch because the disk did
+        print(f"HTML store error for {page.url}: {e}")
+    return cleaned, digest
+
+
+def fetch_cleaned_page(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Fetch a product page as cleaned text in the calling thread, streaming the
+    body through StreamingHtmlCleaner and closing the connection once the
+    character budget is filled.
+    Returns: (cleaned_text, content_hash) or None on failure
+    """
+    page = open_page(url)
+    if not isinstance(page, PageStream):
+        return page
+    cleaner = StreamingHtmlCleaner()
+    try:
+        while True:
+            text, at_end = page.read_window(FETCH_CHUNK_SIZE)
+            feed_cleaner((cleaner, text, at_end))
+            if cleaner.done or at_end:
+                break
+    except requests.RequestException as e:
+        print(f"Error fetching URL {url}: {e}")
+        return None
+    finally:
+        page.close()
+    return finish_page(page, cleaner.text)
+
+
+async def fetch_cleaned_pages(urls: List[str]) -> List[Optional[Tuple[str, str]]]:
+    """
+    fetch_cleaned_page() for many URLs concurrently, in input order. Network
+    reads run on the I/O pool and each window of the page is cleaned on the
+    CPU pool, so cleaning never holds up the event loop or other fetches.
+    """
+    return await asyncio.gather(*(_fetch_cleaned_page_async(url) for url in urls))
+
+
+async def _fetch_cleaned_page_async(url: str) -> Optional[Tuple[str, str]]:
+    page = await run_io(open_page, url)
+    if not isinstance(page, PageStream):
+        return page
+    cleaner = StreamingHtmlCleaner()
+    try:
+        while True:
+            text, at_end = await run_io(page.read_window)
+            [cleaner] = await run_batch(feed_cleaner, [(cleaner, text, at_end)])
+            if cleaner.done or at_end:
+                break
+    except requests.RequestException as e:
+        print(f"Error fetching URL {url}: {e}")
+        return None
+    finally:
+        await run_io(page.close)
+    return await run_io(finish_page, page, cleaner.text)
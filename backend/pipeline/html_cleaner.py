@@ -0,0 +1,168 @@
+"""
+HTML to plain text cleaning for the LLM extraction prompt.
+
+clean_html() is the reference implementation: it runs each regex pass over the
+whole page. StreamingHtmlCleaner produces the same output from a stream of
+chunks, running the same passes as chained incremental stages and stopping as
+soon as the character budget of useful text is filled, so the rest of the page
+never has to be downloaded or parsed.
+"""
+import re
+from typing import Iterable, List, Tuple
+
+CLEAN_TEXT_LIMIT = 10000
+
+SCRIPT_RE = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+STYLE_RE = re.compile(r'<style[^>]*>.*?</style>', re.DOTALL | re.IGNORECASE)
+TAG_RE = re.compile(r'<[^>]+>')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def clean_html(html: str) -> str:
+    """Clean HTML by removing scripts, styles, and extra whitespace."""
+    # Remove script and style tags
+    html = SCRIPT_RE.sub('', html)
+    html = STYLE_RE.sub('', html)
+    # Remove HTML tags but keep text
+    html = TAG_RE.sub(' ', html)
+    # Remove extra whitespace
+    html = WHITESPACE_RE.sub(' ', html)
+    return html.strip()[:CLEAN_TEXT_LIMIT]  # Limit to first 10k characters
+
+
+class _BlockRemover:
+    """
+    Incremental SCRIPT_RE / STYLE_RE removal.
+    Matches found in the buffered text are final (a later chunk cannot create
+    an earlier match), so everything up to the last match is emitted and only
+    an open '<script' candidate - or a tail that could start one - is held.
+    """
+
+    def __init__(self, tag: str, block_re: re.Pattern):
+        self.block_re = block_re
+        self.open_re = re.compile('<' + tag, re.IGNORECASE)
+        self.hold = len(tag)  # '<' + tag minus one character
+        self.buffer = ''
+
+    def feed(self, text: str) -> str:
+        buffer = self.buffer + text
+        end = 0
+        out = []
+        for match in self.block_re.finditer(buffer):
+            out.append(buffer[end:match.start()])
+            end = match.end()
+
+        rest = buffer[end:]
+        candidate = self.open_re.search(rest)
+        cut = candidate.start() if candidate else max(0, len(rest) - self.hold)
+        out.append(rest[:cut])
+        self.buffer = rest[cut:]
+        return ''.join(out)
+
+    def close(self) -> str:
+        # An unterminated block never matches, so it passes through untouched
+        rest, self.buffer = self.buffer, ''
+        return rest
+
+
+class _TagStripper:
+    """Incremental TAG_RE substitution; holds only an unterminated '<...'."""
+
+    def __init__(self):
+        self.buffer = ''
+
+    def feed(self, text: str) -> str:
+        buffer = self.buffer + text
+        # Every '<' before the last '>' has its closing '>' in the buffer
+        cut = buffer.rfind('>') + 1
+        open_at = buffer.find('<', cut)
+        if open_at != -1:
+            cut = open_at
+        else:
+            cut = len(buffer)
+        self.buffer = buffer[cut:]
+        return TAG_RE.sub(' ', buffer[:cut])
+
+    def close(self) -> str:
+        rest, self.buffer = self.buffer, ''
+        return rest
+
+
+class StreamingHtmlCleaner:
+    """
+    Streaming equivalent of clean_html().
+    Feed decoded chunks in order; once `done` is True the output is final and
+    the caller can stop reading. Call close() at end of input, then read `text`.
+    """
+
+    def __init__(self, limit: int = CLEAN_TEXT_LIMIT):
+        self.limit = limit
+        self.stages = [
+            _BlockRemover('script', SCRIPT_RE),
+            _BlockRemover('style', STYLE_RE),
+            _TagStripper(),
+        ]
+        self.parts: List[str] = []
+        self.length = 0
+        self.pending_space = False
+        self.done = False
+
+    def _emit(self, text: str) -> None:
+        """Collapse whitespace and strip leading/trailing space across chunks."""
+        if not text or self.done:
+            return
+        collapsed = WHITESPACE_RE.sub(' ', (' ' if self.pending_space else '') + text)
+        if self.length == 0:
+            collapsed = collapsed.lstrip(' ')
+        # A trailing space is only kept if more text follows (strip())
+        self.pending_space = collapsed.endswith(' ')
+        if self.pending_space:
+            collapsed = collapsed[:-1]
+        if collapsed:
+            self.parts.append(collapsed)
+            self.length += len(collapsed)
+            if self.length >= self.limit:
+                self.done = True
+
+    def feed(self, chunk: str) -> bool:
+        """Process a chunk. Returns True once the character budget is filled."""
+        if self.done:
+            return True
+        for stage in self.stages:
+            chunk = stage.feed(chunk)
+        self._emit(chunk)
+        return self.done
+
+    def close(self) -> None:
+        """Flush text held back by the stages at end of input."""
+        for idx, stage in enumerate(self.stages):
+            tail = stage.close()
+            for next_stage in self.stages[idx + 1:]:
+                tail = next_stage.feed(tail)
+            self._emit(tail)
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.parts)[:self.limit]
+
+
+def feed_cleaner(job: Tuple[StreamingHtmlCleaner, str, bool]) -> StreamingHtmlCleaner:
+    """
+    One cleaning step for run_batch(): feed (cleaner, text, at_end) and
+    return the cleaner, closed at end of input.
+    """
+    cleaner, text, at_end = job
+    if not cleaner.feed(text) and at_end:
+        cleaner.close()
+    return cleaner
+
+
+def clean_html_stream(chunks: Iterable[str], limit: int = CLEAN_TEXT_LIMIT) -> str:
+    """Clean an iterable of decoded HTML chunks, consuming only what is needed."""
+    cleaner = StreamingHtmlCleaner(limit)
+    for chunk in chunks:
+        if cleaner.feed(chunk):
+            break
+    else:
+        cleaner.close()
+    return cleaner.text
@@ -0,0 +1,178 @@
+"""
+Content-addressed store for work derived from fetched product pages.
+
+Pages are identified by the SHA-256 of their (consumed) HTML; the raw HTML
+itself is not kept. Work derived from a page (cleaned text, LLM extraction
+results) is stored under that hash, gzip-compressed where it is text, and
+reused for as long as the content hash stays the same.
+
+The store is bounded: every PRUNE_EVERY writes, if its files add up to more
+than max_bytes, the least recently written ones are deleted until it is back
+under PRUNE_TARGET of the cap. A pruned entry just means a full fetch and a
+new LLM call for that page next time.
+
+Layout under the store root:
+    objects/<ab>/<hash>.clean.gz       cleaned text for a page hash
+    llm/<ab>/<hash>.<model>.json       LLM result for a cleaned text hash
+    urls/<url-hash>.json               ETag / Last-Modified / content hash per URL
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Characters not allowed in the model part of LLM result file names
+MODEL_KEY_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Check the store size once per this many writes
+PRUNE_EVERY = 64
+# Prune down to this share of max_bytes, so pruning is not re-triggered at once
+PRUNE_TARGET = 0.8
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of a text blob."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class HtmlStore:
+    """On-disk, compressed, content-addressed store of derived page data."""
+
+    COMPRESS_LEVEL = 6
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._prune_lock = threading.Lock()
+
+    # ---- paths ----
+
+    def _object_path(self, digest: str, suffix: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}{suffix}"
+
+    def _llm_path(self, digest: str, model: str) -> Path:
+        model_key = MODEL_KEY_RE.sub("_", model)
+        return self.root / "llm" / digest[:2] / f"{digest}.{model_key}.json"
+
+    def _url_path(self, url: str) -> Path:
+        return self.root / "urls" / f"{content_hash(url)}.json"
+
+    # ---- low-level IO ----
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        """Write via a temp file + rename so readers never see partial blobs."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_name, path)
+        except OSError:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self.prune()
+
+    def _files(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every stored file."""
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # removed concurrently
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def prune(self) -> int:
+        """Delete least recently written files while over max_bytes; returns files deleted."""
+        # One pruner at a time; writers never wait for it
+        if not self._prune_lock.acquire(blocking=False):
+            return 0
+        try:
+            files = self._files()
+            total = sum(size for _, size, _ in files)
+            if total <= self.max_bytes:
+                return 0
+            deleted = 0
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes * PRUNE_TARGET:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                deleted += 1
+            print(f"HTML store pruned {deleted} files ({total} bytes left)")
+            return deleted
+        finally:
+            self._prune_lock.release()
+
+    def _read_text_gz(self, path: Path) -> Optional[str]:
+        try:
+            return gzip.decompress(path.read_bytes()).decode("utf-8")
+        except (OSError, EOFError, UnicodeDecodeError):
+            return None
+
+    def _write_text_gz(self, path: Path, text: str) -> None:
+        self._write_atomic(path, gzip.compress(text.encode("utf-8"), self.COMPRESS_LEVEL))
+
+    def _read_json(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path: Path, data: Dict[str, Any]) -> None:
+        self._write_atomic(path, json.dumps(data).encode("utf-8"))
+
+    # ---- cleaned text ----
+
+    def put_cleaned(self, digest: str, text: str) -> None:
+        self._write_text_gz(self._object_path(digest, ".clean.gz"), text)
+
+    def get_cleaned(self, digest: str) -> Optional[str]:
+        return self._read_text_gz(self._object_path(digest, ".clean.gz"))
+
+    # ---- LLM results ----
+
+    def put_llm_result(self, digest: str, model: str, data: Dict[str, Any]) -> None:
+        self._write_json(self._llm_path(digest, model), data)
+
+    def get_llm_result(self, digest: str, model: str) -> Optional[Dict[str, Any]]:
+        return self._read_json(self._llm_path(digest, model))
+
+    # ---- per-URL revalidation metadata ----
+
+    def get_url_entry(self, url: str) -> Optional[Dict[str, Any]]:
+        return self._read_json(self._url_path(url))
+
+    def put_url_entry(
+        self,
+        url: str,
+        digest: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        self._write_json(self._url_path(url), {
+            "url": url,
+            "content_hash": digest,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        })
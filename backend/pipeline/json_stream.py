@@ -0,0 +1,102 @@
+"""
+Incremental parser for the first JSON object (or array) in a text stream.
+
+LLMs often wrap the JSON they were asked for in chatter. The parser skips
+text up to the first opening bracket, tracks nesting and string state as
+chunks arrive, reports each top-level member as soon as it is complete and
+marks the parse complete at the matching closing bracket, so the caller can
+stop reading the stream there.
+"""
+import json
+from typing import Any, List, Optional, Tuple
+
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+class IncrementalJSONParser:
+    """
+    Feed text chunks in order. feed() returns the top-level members completed
+    by that chunk: (key, value) pairs for an object, (index, value) for an
+    array. Once `complete` is True, `value` holds the whole parsed document
+    (None if it turned out to be invalid JSON).
+    """
+
+    def __init__(self, container: str = '{'):
+        if container not in _CLOSERS:
+            raise ValueError("container must be '{' or '['")
+        self.container = container
+        self.buffer: List[str] = []
+        self.started = False
+        self.complete = False
+        self.value: Optional[Any] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member: List[str] = []
+        self._index = 0
+
+    def feed(self, text: str) -> List[Tuple[Any, Any]]:
+        members = []
+        for char in text:
+            if self.complete:
+                break
+
+            if not self.started:
+                if char == self.container:
+                    self.started = True
+                    self._depth = 1
+                    self.buffer.append(char)
+                continue
+
+            self.buffer.append(char)
+
+            if self._in_string:
+                self._member.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+
+            if (self._depth == 1 and char == ',') or self._depth == 0:
+                member = self._finish_member()
+                if member is not None:
+                    members.append(member)
+                if self._depth == 0:
+                    self._finish()
+                continue
+
+            self._member.append(char)
+        return members
+
+    def _finish_member(self) -> Optional[Tuple[Any, Any]]:
+        text = ''.join(self._member).strip()
+        self._member = []
+        if not text:
+            return None
+        try:
+            if self.container == '{':
+                (key, value), = json.loads('{' + text + '}').items()
+                return key, value
+            value = json.loads(text)
+            index = self._index
+            self._index += 1
+            return index, value
+        except ValueError:
+            return None
+
+    def _finish(self) -> None:
+        self.complete = True
+        try:
+            self.value = json.loads(''.join(self.buffer))
+        except ValueError:
+            self.value = None
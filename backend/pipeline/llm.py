@@ -0,0 +1,427 @@
+"""
+OpenRouter LLM spec extraction for the Amazon pipeline.
+
+Completions are requested as a server-sent event stream and fed through
+IncrementalJSONParser; the stream is closed as soon as the top-level JSON
+object is complete, so chatter the model adds after the JSON is never
+generated or billed in full.
+
+extract_specs_hedged() cuts tail latency: if the primary model has not
+answered by a deadline (by default its observed p90), the same request goes
+to a fallback model and whichever returns valid JSON first wins.
+
+Configuration (environment):
+    OPENROUTER_FALLBACK_MODEL    model for hedged requests (hedging off if unset)
+    OPENROUTER_HEDGE_DELAY_MS    fixed hedge deadline instead of the observed p90
+    OPENROUTER_HEDGE_PERCENTILE  percentile of primary latency used as deadline (default 90)
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from fastapi import HTTPException
+
+from pipeline import metrics
+from pipeline.fetch import get_html_store
+from pipeline.html_store import content_hash
+from pipeline.json_stream import IncrementalJSONParser
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# Hedge deadline used until enough primary latencies have been observed
+DEFAULT_HEDGE_DELAY = 10.0
+HEDGE_MIN_SAMPLES = 20
+
+FieldCallback = Callable[[str, Any], None]
+
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_cancel_pool: Optional[ThreadPoolExecutor] = None
+
+
+class CancelToken:
+    """Lets a hedging coordinator abort an in-flight streamed request."""
+
+    def __init__(self):
+        self.cancelled = False
+        self._response: Optional[requests.Response] = None
+        self._lock = threading.Lock()
+
+    def attach(self, response: requests.Response) -> None:
+        with self._lock:
+            self._response = response
+            if self.cancelled:
+                response.close()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._response is not None:
+                # Closing the socket unblocks the reader thread
+                self._response.close()
+
+
+SPEC_FIELDS_SCHEMA = """{
+  "name": "product name",
+  "price": numeric price in INR (extract from page, convert USD to INR if needed, use 83.0 exchange rate),
+  "battery_life": numeric hours (null if not applicable or wired),
+  "latency": numeric milliseconds (null if not available),
+  "num_mics": numeric count (0 if not mentioned),
+  "device_type": one of ["Wireless Earbuds", "Wired Earbuds", "Over-Ear Wireless", "Over-Ear Wired", "Neckband"],
+  "water_resistance": string rating like "IPX4" or "IPX5" (use "None" if not found),
+  "driver_size": numeric millimeters (null if not available)
+}"""
+
+
+def build_extraction_prompt(html_content: str, product_url: str) -> str:
+    return f"""Extract headphone specifications from this product page HTML. Return ONLY a JSON object with these exact fields:
+{SPEC_FIELDS_SCHEMA}
+
+Extract ALL available information. Use sensible defaults only when truly unavailable.
+Return ONLY valid JSON, no additional text.
+
+HTML Content:
+{html_content}
+
+URL: {product_url}
+"""
+
+
+def check_openrouter_error(payload: Dict[str, Any]) -> bool:
+    """
+    Inspect an OpenRouter payload for an error.
+    Raises HTTPException for quota/auth errors; returns True for other errors.
+    """
+    if "error" not in payload:
+        return False
+
+    error = payload["error"]
+    error_msg = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+    print(f"OpenRouter error: {error_msg}")
+
+    if "quota" in error_msg.lower() or "rate" in error_msg.lower():
+        raise HTTPException(status_code=429, detail=f"API quota/rate limit: {error_msg}")
+    if "auth" in error_msg.lower() or "invalid" in error_msg.lower():
+        raise HTTPException(status_code=401, detail=f"API authentication failed: {error_msg}")
+    return True
+
+
+def stream_completion_json(
+    response: requests.Response,
+    parser: IncrementalJSONParser,
+    on_field: Optional[FieldCallback] = None,
+    cancel_token: Optional[CancelToken] = None,
+) -> Optional[Any]:
+    """
+    Feed a streamed chat completion into `parser` until the JSON document is
+    complete. Returns the parsed document, or None if the stream ended first
+    or was cancelled.
+    """
+    # SSE is UTF-8 by spec, but requests falls back to ISO-8859-1 for text/*
+    # without a charset, so lines are decoded here rather than by requests
+    for raw_line in response.iter_lines():
+        if cancel_token and cancel_token.cancelled:
+            return None
+        line = raw_line.decode("utf-8", errors="replace")
+        # SSE: "data: {...}" events; ":" lines are keep-alive comments
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+
+        event = json.loads(data)
+        if check_openrouter_error(event):
+            return None
+
+        for choice in event.get("choices") or []:
+            content = (choice.get("delta") or {}).get("content")
+            if not content:
+                continue
+            for key, value in parser.feed(content):
+                if on_field:
+                    on_field(key, value)
+            if parser.complete:
+                return parser.value
+    return None
+
+
+def request_completion_json(
+    prompt: str,
+    model: str,
+    api_key: str,
+    container: str = '{',
+    on_field: Optional[FieldCallback] = None,
+    cancel_token: Optional[CancelToken] = None,
+    timeout: float = 30,
+) -> Optional[Any]:
+    """
+    Send a single-message chat completion and parse the first JSON object
+    (container '{') or array ('[') out of the streamed reply.
+    Returns the parsed document or None on failure.
+    """
+    try:
+        response = requests.post(
+            OPENROUTER_URL,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "HTTP-Referer": "https://frequency-labs.com",
+                "X-Title": "Frequency Labs",
+            },
+            json={
+                "model": model,
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.1,  # Low temperature for structured output
+                "stream": True,
+            },
+            timeout=timeout,
+            stream=True,
+        )
+        if cancel_token:
+            cancel_token.attach(response)
+
+        # Closing the response ends the stream early once the JSON is complete
+        with response:
+            response.raise_for_status()
+            parser = IncrementalJSONParser(container)
+
+            if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                # Non-streamed reply (e.g. an error payload)
+                result = response.json()
+                if check_openrouter_error(result):
+                    return None
+                choices = result.get("choices") or []
+                content = (choices[0].get("message") or {}).get("content", "") if choices else ""
+                for key, value in parser.feed(content):
+                    if on_field:
+                        on_field(key, value)
+                parsed = parser.value
+            else:
+                parsed = stream_completion_json(response, parser, on_field, cancel_token)
+
+        if parsed is not None:
+            return parsed
+        if cancel_token and cancel_token.cancelled:
+            return None
+
+        print(f"Could not extract JSON from response: {''.join(parser.buffer)[:200]}")
+        return None
+
+    except requests.exceptions.HTTPError as e:
+        print(f"HTTP Error: {e.response.status_code} - {e.response.text}")
+        return None
+    except Exception as e:
+        if cancel_token and cancel_token.cancelled:
+            return None
+        print(f"Error extracting specs: {type(e).__name__}: {str(e)}")
+        return None
+
+
+def extract_specs_with_llm(
+    html_content: str,
+    product_url: str,
+    model: str,
+    api_key: str,
+    on_field: Optional[FieldCallback] = None,
+    cancel_token: Optional[CancelToken] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Use OpenRouter LLM to extract headphone specs from HTML content.
+    Args:
+        html_content: Cleaned HTML text
+        product_url: URL for context
+        model: Model name (e.g., "openrouter/auto", "mistralai/mistral-small", etc.)
+        api_key: OpenRouter API key
+        on_field: Optional callback invoked with (field, value) as each field arrives
+        cancel_token: Optional token to abort the request from another thread
+    Returns: Dictionary with extracted specs or None on failure
+    """
+    if not api_key:
+        print("No API key provided")
+        return None
+
+    parsed = request_completion_json(
+        build_extraction_prompt(html_content, product_url),
+        model,
+        api_key,
+        on_field=on_field,
+        cancel_token=cancel_token,
+    )
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    if _hedge_pool is None:
+        _hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+    return _hedge_pool
+
+
+def _get_cancel_pool() -> ThreadPoolExecutor:
+    """Closes losing streams; separate so a busy hedge pool can't delay it."""
+    global _cancel_pool
+    if _cancel_pool is None:
+        _cancel_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="llm-cancel")
+    return _cancel_pool
+
+
+def get_hedge_delay() -> float:
+    """Seconds to wait for the primary model before hedging."""
+    fixed_ms = os.getenv("OPENROUTER_HEDGE_DELAY_MS")
+    if fixed_ms:
+        try:
+            return max(0.0, float(fixed_ms) / 1000)
+        except ValueError:
+            print(f"Invalid OPENROUTER_HEDGE_DELAY_MS '{fixed_ms}', using observed latency")
+
+    if metrics.timing_count("llm.primary_seconds") < HEDGE_MIN_SAMPLES:
+        return DEFAULT_HEDGE_DELAY
+    try:
+        q = float(os.getenv("OPENROUTER_HEDGE_PERCENTILE") or 90)
+    except ValueError:
+        q = 90.0
+    return metrics.percentile("llm.primary_seconds", q)
+
+
+class _Attempt:
+    """When a request started running on the hedge pool (queue time excluded)."""
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.started = threading.Event()
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self.started.set()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+
+def _timed_extract(
+    html_content: str,
+    product_url: str,
+    model: str,
+    api_key: str,
+    cancel_token: CancelToken,
+    attempt: _Attempt,
+):
+    attempt.start()
+    result = extract_specs_with_llm(html_content, product_url, model, api_key, cancel_token=cancel_token)
+    return result, attempt.elapsed()
+
+
+def _record_hedge_outcome(hedged: bool, winner: Optional[str]) -> None:
+    metrics.increment("llm.requests")
+    if hedged:
+        metrics.increment("llm.hedges")
+    if winner:
+        metrics.increment(f"llm.wins.{winner}")
+    else:
+        metrics.increment("llm.failures")
+
+    requests_total = metrics.counter("llm.requests")
+    hedges = metrics.counter("llm.hedges")
+    metrics.set_gauge("llm.hedge_rate", round(hedges / requests_total, 4) if requests_total else 0)
+    metrics.set_gauge(
+        "llm.fallback_win_rate",
+        round(metrics.counter("llm.wins.fallback") / hedges, 4) if hedges else 0,
+    )
+
+
+def extract_specs_hedged(
+    html_content: str,
+    product_url: str,
+    model: str,
+    api_key: str,
+    fallback_model: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    extract_specs_with_llm() with a hedged request to `fallback_model` when the
+    primary has not returned valid JSON by get_hedge_delay() (or failed
+    earlier). The first valid result wins; the other request is cancelled.
+    The hedge deadline and primary latency samples count from when the
+    primary request starts running, not from when it was queued.
+    """
+    if not fallback_model or fallback_model == model:
+        started = time.perf_counter()
+        result = extract_specs_with_llm(html_content, product_url, model, api_key)
+        if result:
+            metrics.observe("llm.primary_seconds", time.perf_counter() - started)
+        _record_hedge_outcome(False, "primary" if result else None)
+        return result
+
+    pool = _get_hedge_pool()
+    tokens = {"primary": CancelToken(), "fallback": CancelToken()}
+    primary = _Attempt()
+    futures = {
+        pool.submit(_timed_extract, html_content, product_url, model, api_key, tokens["primary"], primary): "primary"
+    }
+
+    primary.started.wait()
+    done, _ = wait(futures, timeout=max(0.0, get_hedge_delay() - primary.elapsed()))
+    hedged = False
+    winner = None
+    result = None
+
+    for future in done:
+        result, elapsed = future.result()
+        if result:
+            winner = "primary"
+            metrics.observe("llm.primary_seconds", elapsed)
+
+    if not winner:
+        hedged = True
+        futures[pool.submit(
+            _timed_extract, html_content, product_url, fallback_model, api_key, tokens["fallback"], _Attempt()
+        )] = "fallback"
+        pending = {future for future in futures if not future.done()}
+
+        while pending and not winner:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidate, elapsed = future.result()
+                if candidate and not winner:
+                    winner = futures[future]
+                    result = candidate
+                    if winner == "primary":
+                        metrics.observe("llm.primary_seconds", elapsed)
+
+        for future in pending:
+            if futures[future] == "primary":
+                # Record the censored primary latency as a lower bound so the
+                # p90 deadline does not drift down as slow answers get cut off
+                metrics.observe("llm.primary_seconds", primary.elapsed())
+            # Closing a busy connection can block; don't make the winner wait
+            _get_cancel_pool().submit(tokens[futures[future]].cancel)
+
+    _record_hedge_outcome(hedged, winner)
+    return result if winner else None
+
+
+def extract_specs_cached(
+    cleaned_html: str,
+    product_url: str,
+    model: str,
+    api_key: str,
+    fallback_model: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """extract_specs_hedged() with successful results reused for unchanged cleaned text."""
+    store = get_html_store()
+    digest = content_hash(cleaned_html)
+    llm_data = store.get_llm_result(digest, model)
+    if llm_data is not None:
+        return llm_data
+
+    llm_data = extract_specs_hedged(cleaned_html, product_url, model, api_key, fallback_model)
+    if llm_data:
+        try:
+            store.put_llm_result(digest, model, llm_data)
+        except OSError as e:
+            print(f"HTML store error: {e}")
+    return llm_data
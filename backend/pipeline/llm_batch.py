@@ -0,0 +1,215 @@
+"""
+Batched LLM spec extraction: several cleaned product pages per request.
+
+The extraction instructions are sent once per batch instead of once per
+product, and the model answers with a JSON array keyed by product ("p0",
+"p1", ...). Batches are packed greedily under a token budget; a batch that
+comes back with some products missing is split in half and retried, down to
+single products, which go through the regular (hedged) extraction. A batch
+with no products answered at all is reported as failed without retrying.
+
+Configuration (environment):
+    OPENROUTER_BATCH_EXTRACTION     "true" to enable batched extraction
+    OPENROUTER_BATCH_TOKEN_BUDGET   estimated prompt + answer tokens per batch (default 24000)
+    OPENROUTER_BATCH_MAX_ITEMS      products per batch (default 8)
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from pipeline import metrics
+from pipeline.fetch import get_html_store
+from pipeline.html_store import content_hash
+from pipeline.llm import SPEC_FIELDS_SCHEMA, extract_specs_hedged, request_completion_json
+
+DEFAULT_TOKEN_BUDGET = 24000
+DEFAULT_MAX_ITEMS = 8
+# Rough tokens-per-character for prompt size estimates
+CHARS_PER_TOKEN = 4
+# Reserved answer tokens per product
+ANSWER_TOKENS_PER_ITEM = 200
+
+# (cleaned_html, product_url)
+BatchItem = Tuple[str, str]
+
+
+def batch_extraction_enabled() -> bool:
+    return (os.getenv("OPENROUTER_BATCH_EXTRACTION") or "").strip().lower() in ("1", "true", "yes")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name) or default)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+BATCH_PROMPT_HEADER = f"""Extract headphone specifications for each product page below. Return ONLY a JSON array with one object per product, in any order. Each object must have a "key" field with the product key shown in its header, plus these exact fields:
+{SPEC_FIELDS_SCHEMA}
+
+Extract ALL available information. Use sensible defaults only when truly unavailable.
+Return ONLY valid JSON, no additional text.
+"""
+
+
+def build_batch_prompt(items: List[BatchItem], keys: List[str]) -> str:
+    sections = [BATCH_PROMPT_HEADER]
+    for key, (html_content, product_url) in zip(keys, items):
+        sections.append(f"""
+### Product {key}
+URL: {product_url}
+HTML Content:
+{html_content}
+""")
+    return "".join(sections)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack_batches(items: List[BatchItem], token_budget: int, max_items: int) -> List[List[int]]:
+    """Greedily group item indices into batches that fit the token budget."""
+    header_tokens = estimate_tokens(BATCH_PROMPT_HEADER)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = header_tokens
+
+    for idx, (html_content, product_url) in enumerate(items):
+        cost = estimate_tokens(html_content) + estimate_tokens(product_url) + ANSWER_TOKENS_PER_ITEM + 10
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            used = header_tokens
+        current.append(idx)
+        used += cost
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _map_batch_response(parsed: Any, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Map the array answer back to product keys. The model may answer in any
+    order, so entries without a known key are dropped (those products count
+    as missing) rather than matched up by position.
+    """
+    if not isinstance(parsed, list):
+        return {}
+
+    by_key = {}
+    for entry in parsed:
+        if not isinstance(entry, dict):
+            continue
+        key = str(entry.get("key", ""))
+        if key in keys and key not in by_key:
+            by_key[key] = {k: v for k, v in entry.items() if k != "key"}
+    return by_key
+
+
+def _extract_batch(
+    items: List[BatchItem],
+    indices: List[int],
+    model: str,
+    api_key: str,
+    fallback_model: Optional[str],
+) -> Dict[int, Optional[Dict[str, Any]]]:
+    """
+    Extract one batch, splitting it in half on a partial answer. When no
+    product comes back at all (HTTP error, rate limit, unusable reply) the
+    batch is not retried: splitting would only multiply the failing requests.
+    """
+    if len(indices) == 1:
+        html_content, product_url = items[indices[0]]
+        return {indices[0]: extract_specs_hedged(html_content, product_url, model, api_key, fallback_model)}
+
+    keys = [f"p{n}" for n in range(len(indices))]
+    batch_items = [items[idx] for idx in indices]
+    metrics.increment("llm.batch_requests")
+    metrics.increment("llm.batch_items", len(indices))
+
+    parsed = request_completion_json(
+        build_batch_prompt(batch_items, keys),
+        model,
+        api_key,
+        container='[',
+        timeout=30 + 10 * len(indices),
+    )
+    by_key = _map_batch_response(parsed, keys)
+    if not by_key:
+        metrics.increment("llm.batch_failures")
+        return {idx: None for idx in indices}
+
+    results = {}
+    missing = []
+    for key, idx in zip(keys, indices):
+        if by_key.get(key):
+            results[idx] = by_key[key]
+        else:
+            missing.append(idx)
+
+    if missing:
+        metrics.increment("llm.batch_splits")
+        half = (len(missing) + 1) // 2
+        for part in (missing[:half], missing[half:]):
+            if part:
+                results.update(_extract_batch(items, part, model, api_key, fallback_model))
+    return results
+
+
+def extract_specs_batch(
+    items: List[BatchItem],
+    model: str,
+    api_key: str,
+    fallback_model: Optional[str] = None,
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Extract specs for many products with as few requests as possible.
+    Returns one result (or None) per item, in input order.
+    """
+    if not items:
+        return []
+    if not api_key:
+        print("No API key provided")
+        return [None] * len(items)
+
+    batches = pack_batches(
+        items,
+        _env_int("OPENROUTER_BATCH_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET),
+        _env_int("OPENROUTER_BATCH_MAX_ITEMS", DEFAULT_MAX_ITEMS),
+    )
+
+    results: Dict[int, Optional[Dict[str, Any]]] = {}
+    with ThreadPoolExecutor(max_workers=len(batches), thread_name_prefix="llm-batch") as pool:
+        for batch_results in pool.map(
+            lambda indices: _extract_batch(items, indices, model, api_key, fallback_model),
+            batches,
+        ):
+            results.update(batch_results)
+    return [results.get(idx) for idx in range(len(items))]
+
+
+def extract_specs_batch_cached(
+    items: List[BatchItem],
+    model: str,
+    api_key: str,
+    fallback_model: Optional[str] = None,
+) -> List[Optional[Dict[str, Any]]]:
+    """extract_specs_batch() with successful results reused for unchanged cleaned text."""
+    store = get_html_store()
+    digests = [content_hash(html_content) for html_content, _ in items]
+    results = [store.get_llm_result(digest, model) for digest in digests]
+
+    misses = [idx for idx, result in enumerate(results) if result is None]
+    extracted = extract_specs_batch([items[idx] for idx in misses], model, api_key, fallback_model)
+
+    for idx, llm_data in zip(misses, extracted):
+        results[idx] = llm_data
+        if llm_data:
+            try:
+                store.put_llm_result(digests[idx], model, llm_data)
+            except OSError as e:
+                print(f"HTML store error: {e}")
+    return results
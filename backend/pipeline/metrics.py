@@ -0,0 +1,80 @@
+"""
+In-process metrics for the Amazon pipeline, served by the /metrics endpoint.
+Counters only go up, gauges hold the latest value, and timings keep a bounded
+window of recent samples for percentiles.
+"""
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+TIMING_WINDOW = 500
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, Any] = {}
+_timings: Dict[str, Deque[float]] = {}
+
+
+def increment(name: str, value: float = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: Any) -> None:
+    with _lock:
+        _gauges[name] = value
+
+
+def add_gauge(name: str, delta: float) -> None:
+    with _lock:
+        _gauges[name] = _gauges.get(name, 0) + delta
+
+
+def observe(name: str, value: float) -> None:
+    """Record a timing sample (seconds)."""
+    with _lock:
+        samples = _timings.get(name)
+        if samples is None:
+            samples = _timings[name] = deque(maxlen=TIMING_WINDOW)
+        samples.append(value)
+
+
+def counter(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def timing_count(name: str) -> int:
+    with _lock:
+        return len(_timings.get(name, ()))
+
+
+def _percentile(sorted_samples, q: float) -> Optional[float]:
+    if not sorted_samples:
+        return None
+    idx = min(len(sorted_samples) - 1, int(round(q / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[idx]
+
+
+def percentile(name: str, q: float) -> Optional[float]:
+    """q-th percentile (0-100) of recent samples, or None without samples."""
+    with _lock:
+        samples = sorted(_timings.get(name, ()))
+    return _percentile(samples, q)
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        timings = {name: sorted(samples) for name, samples in _timings.items()}
+        result = {"counters": dict(_counters), "gauges": dict(_gauges)}
+
+    result["timings"] = {
+        name: {
+            "count": len(samples),
+            "p50": _percentile(samples, 50),
+            "p90": _percentile(samples, 90),
+            "p99": _percentile(samples, 99),
+        }
+        for name, samples in timings.items()
+    }
+    return result
@@ -0,0 +1,161 @@
+"""
+Parsing helpers for the Amazon pipeline: turn LLM-extracted product data into
+the headphone input format. These are pure functions with no app imports so
+they can run in CPU pool worker processes (see pipeline/workers.py).
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+NUMBER_RE = re.compile(r"(\d+(?:\.\d+)?)")
+HOURS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(hour|hours|hr|hrs)", re.IGNORECASE)
+MIC_COUNT_RE = re.compile(r"(\d+)\s*(mic|mics|microphone|microphones)", re.IGNORECASE)
+
+HEADPHONE_KEYWORDS = [
+    "headphone", "headphones", "earbud", "earbuds", "earphone", "earphones",
+    "over-ear", "on-ear", "neckband", "tws", "iem", "in-ear"
+]
+
+
+def is_headphone_related_product(llm_data: Dict[str, Any]) -> bool:
+    """Best-effort check to confirm extracted product is headphone-related."""
+    name = str(llm_data.get("name") or "").lower()
+    device_type = str(llm_data.get("device_type") or "").lower()
+    combined = f"{name} {device_type}"
+
+    if any(keyword in combined for keyword in HEADPHONE_KEYWORDS):
+        return True
+
+    valid_type_fragments = ["wireless earbuds", "wired earbuds", "over-ear", "neckband", "on-ear", "headphone"]
+    return any(fragment in device_type for fragment in valid_type_fragments)
+
+
+def parse_number_from_text(text: str) -> Optional[float]:
+    if not text:
+        return None
+    match = NUMBER_RE.search(text)
+    if not match:
+        return None
+    return float(match.group(1))
+
+def parse_price_value(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        cleaned = value.replace(",", "").strip()
+        try:
+            return float(cleaned)
+        except ValueError:
+            return parse_number_from_text(cleaned)
+    return None
+
+def parse_hours_from_text(text: str) -> Optional[float]:
+    if not text:
+        return None
+    match = HOURS_RE.search(text)
+    if match:
+        return float(match.group(1))
+    return None
+
+def parse_mic_count(text: str) -> Optional[int]:
+    if not text:
+        return None
+    match = MIC_COUNT_RE.search(text)
+    if match:
+        return int(match.group(1))
+    return None
+
+def extract_from_specifications(specs: List[Dict[str, Any]], name_patterns: List[str]) -> Optional[str]:
+    """Placeholder for compatibility - not used with LLM extraction."""
+    for spec in specs or []:
+        name = str(spec.get("name", "")).lower()
+        if any(pattern in name for pattern in name_patterns):
+            return str(spec.get("value", "")).strip()
+    return None
+
+def extract_from_feature_bullets(bullets: List[str], pattern: str) -> Optional[str]:
+    """Placeholder for compatibility - not used with LLM extraction."""
+    for bullet in bullets or []:
+        if re.search(pattern, bullet, flags=re.IGNORECASE):
+            return bullet
+    return None
+
+def water_resistance_to_float(rating: str) -> float:
+    """Convert IPX rating string to numeric score for Headphone model"""
+    mapping = {
+        'None': 0.0,
+        'IPX0': 0.0,
+        'IPX1': 0.1,
+        'IPX2': 0.2,
+        'IPX3': 0.3,
+        'IPX4': 0.4,
+        'IPX5': 0.5,
+        'IPX6': 0.6,
+        'IPX7': 0.7,
+        'IPX8': 0.8,
+        'IPX9': 0.9,
+    }
+    return mapping.get(rating, 0.4)
+
+def map_llm_response_to_headphone(llm_data: Dict[str, Any]) -> tuple:
+    """
+    Map LLM extracted data to headphone input format.
+    Returns: (headphone_dict, missing_fields_list)
+    """
+    missing_fields = []
+    
+    # Extract each field with validation
+    name = llm_data.get("name") or "Unknown Headphone"
+    
+    price = parse_price_value(llm_data.get("price"))
+    if price is None or price <= 0:
+        price = 5000
+        missing_fields.append("price")
+    
+    battery_life = parse_price_value(llm_data.get("battery_life"))
+    if battery_life is None:
+        missing_fields.append("battery_life")
+    
+    latency = parse_price_value(llm_data.get("latency"))
+    if latency is None:
+        missing_fields.append("latency")
+    
+    num_mics = int(parse_price_value(llm_data.get("num_mics") or 0))
+    if num_mics == 0:
+        missing_fields.append("num_mics")
+    
+    device_type = llm_data.get("device_type") or "Wireless Earbuds"
+    
+    water_resistance_str = llm_data.get("water_resistance") or "None"
+    water_resistance = water_resistance_to_float(water_resistance_str)
+    if water_resistance_str == "None":
+        missing_fields.append("water_resistance")
+    
+    driver_size = parse_price_value(llm_data.get("driver_size"))
+    if driver_size is None:
+        missing_fields.append("driver_size")
+    
+    return {
+        "name": name,
+        "price": price,
+        "battery_life": battery_life,
+        "latency": latency,
+        "num_mics": num_mics,
+        "device_type": device_type,
+        "water_resistance": water_resistance,
+        "driver_size": driver_size,
+    }, missing_fields
+
+
+def prepare_llm_result(llm_data: Optional[Dict[str, Any]]) -> Optional[Tuple[bool, Dict[str, Any], List[str]]]:
+    """
+    Validate and map one LLM result in a single worker call.
+    Returns: None if extraction failed, else (is_headphone, headphone_dict, missing_fields)
+    """
+    if not llm_data:
+        return None
+    if not is_headphone_related_product(llm_data):
+        return False, {"name": llm_data.get("name", "Unknown Product")}, []
+    headphone_dict, missing_fields = map_llm_response_to_headphone(llm_data)
+    return True, headphone_dict, missing_fields
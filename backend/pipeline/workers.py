@@ -0,0 +1,158 @@
+"""
+Execution layer for the Amazon pipeline.
+
+Page cleaning and the regex-heavy parsing helpers are CPU-bound; run on the
+event loop thread they stall every other request. run_batch() sends that work
+to a shared CPU pool instead, one submission per batch of items, so IPC
+overhead is paid per batch rather than per item.
+
+Blocking network I/O (URL expansion, page reads, OpenRouter calls) goes
+through run_io() on a separate, bounded thread pool, so it neither occupies
+CPU workers nor competes with other users of asyncio's default executor.
+
+start_pools() creates both pools and starts the CPU workers ahead of the
+first request; otherwise they are created on first use.
+
+Configuration (environment):
+    CPU_POOL_KIND   "process" (default) or "thread"
+    CPU_POOL_SIZE   number of CPU workers (default: CPU count)
+    IO_POOL_SIZE    number of I/O threads (default 32)
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, List, Optional
+
+from pipeline import metrics
+
+POOL_KINDS = ("process", "thread")
+DEFAULT_IO_POOL_SIZE = 32
+
+_pool: Optional[Executor] = None
+_pool_size = 0
+_io_pool: Optional[ThreadPoolExecutor] = None
+# Pools may be created from the startup preload thread and the event loop at once
+_pool_lock = threading.Lock()
+
+
+def _pool_config():
+    kind = (os.getenv("CPU_POOL_KIND") or "process").strip().lower()
+    if kind not in POOL_KINDS:
+        print(f"Unknown CPU_POOL_KIND '{kind}', using 'process'")
+        kind = "process"
+    try:
+        size = int(os.getenv("CPU_POOL_SIZE") or 0)
+    except ValueError:
+        size = 0
+    return kind, size if size > 0 else (os.cpu_count() or 1)
+
+
+def get_cpu_pool() -> Executor:
+    """Shared CPU pool, created on first use."""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None:
+            kind, size = _pool_config()
+            if kind == "process":
+                # spawn, not fork: the server process is multi-threaded
+                _pool = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                _pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="cpu-pool")
+            _pool_size = size
+            metrics.set_gauge("cpu_pool.kind", kind)
+            metrics.set_gauge("cpu_pool.size", size)
+            metrics.set_gauge("cpu_pool.in_flight", 0)
+        return _pool
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    """Shared I/O thread pool, created on first use."""
+    global _io_pool
+    with _pool_lock:
+        if _io_pool is None:
+            try:
+                size = int(os.getenv("IO_POOL_SIZE") or DEFAULT_IO_POOL_SIZE)
+            except ValueError:
+                size = DEFAULT_IO_POOL_SIZE
+            size = size if size > 0 else DEFAULT_IO_POOL_SIZE
+            _io_pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="io-pool")
+            metrics.set_gauge("io_pool.size", size)
+            metrics.set_gauge("io_pool.in_flight", 0)
+        return _io_pool
+
+
+def _noop() -> None:
+    return None
+
+
+def start_pools() -> None:
+    """Create both pools (publishing their gauges) and start the CPU workers."""
+    pool = get_cpu_pool()
+    get_io_pool()
+    # Process workers are spawned on demand; spawning them now keeps the
+    # interpreter start-up out of the first link request
+    started = time.perf_counter()
+    wait([pool.submit(_noop) for _ in range(_pool_size)])
+    metrics.set_gauge("cpu_pool.start_seconds", round(time.perf_counter() - started, 4))
+
+
+def shutdown_pools() -> None:
+    global _pool, _io_pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _io_pool is not None:
+            _io_pool.shutdown(wait=False, cancel_futures=True)
+            _io_pool = None
+
+
+async def run_io(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking I/O call on the I/O pool."""
+    pool = get_io_pool()
+    metrics.add_gauge("io_pool.in_flight", 1)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    finally:
+        metrics.add_gauge("io_pool.in_flight", -1)
+
+
+def _run_batch(fn: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+    """Worker-side loop over one batch (module-level so it pickles)."""
+    return [fn(item) for item in items]
+
+
+async def run_batch(fn: Callable[[Any], Any], items: Iterable[Any], batch_size: Optional[int] = None) -> List[Any]:
+    """
+    Apply fn to every item on the CPU pool and return results in order.
+    fn must be a module-level function so process workers can import it.
+    By default items are split evenly into one batch per worker.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    pool = get_cpu_pool()
+    if not batch_size:
+        batch_size = math.ceil(len(items) / _pool_size)
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+    loop = asyncio.get_running_loop()
+    metrics.increment("cpu_pool.batches", len(batches))
+    metrics.increment("cpu_pool.tasks", len(items))
+    metrics.add_gauge("cpu_pool.in_flight", len(batches))
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, _run_batch, fn, batch)
+            for batch in batches
+        ))
+    finally:
+        metrics.add_gauge("cpu_pool.in_flight", -len(batches))
+        metrics.observe("cpu_pool.batch_seconds", time.perf_counter() - started)
+
+    return [result for batch_results in results for result in batch_results]
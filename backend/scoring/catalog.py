@@ -0,0 +1,147 @@
+"""
+In-memory headphone catalog for catalog-scale ranking.
+
+The catalog keeps Pareto layers (scoring/pareto.py) up to date as items are
+added, updated or removed: one set over the per-use-case score vectors
+for score ranking, and one that also includes price for value ranking.
+Ranking with pruning scores only the top `top_k` layers of each and gives
+the same top K as scoring the whole catalog. Keeping the layers current costs
+a scan of the catalog per insert, so bulk loads are O(n²).
+
+Catalog requests are served from the threadpool; `lock` serializes them,
+including listeners such as the similarity index.
+"""
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from models.headphone import UseCase
+from scoring.pareto import ParetoLayers, dominance_vector
+from scoring.scoring_logic import evaluate_headphones
+
+# (item_id, headphone dict or None when removed)
+CatalogListener = Callable[[str, Optional[Dict[str, Any]]], None]
+
+
+class Catalog:
+    """Headphones keyed by id, in insertion order, with score/value Pareto layers."""
+
+    def __init__(self, depth: int = 10):
+        self.depth = depth
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.seqs: Dict[str, int] = {}
+        self._next_seq = 0
+        self.score_layers = ParetoLayers(depth)
+        self.value_layers = ParetoLayers(depth)
+        self._listeners: List[CatalogListener] = []
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add_listener(self, listener: CatalogListener) -> None:
+        """Called after every upsert/remove, e.g. to keep other indexes in sync."""
+        self._listeners.append(listener)
+
+    def _notify(self, item_id: str, headphone: Optional[Dict[str, Any]]) -> None:
+        for listener in self._listeners:
+            listener(item_id, headphone)
+
+    def upsert(self, item_id: str, headphone: Dict[str, Any]) -> None:
+        """Add or replace an item; replaced items keep their catalog position."""
+        headphone = dict(headphone, id=item_id)
+        if not headphone.get('name'):
+            headphone['name'] = item_id
+
+        with self.lock:
+            seq = self.seqs.get(item_id)
+            if seq is None:
+                seq = self.seqs[item_id] = self._next_seq
+                self._next_seq += 1
+
+            self.items[item_id] = headphone
+            self.score_layers.insert(item_id, seq, dominance_vector(headphone))
+            self.value_layers.insert(item_id, seq, dominance_vector(headphone, include_price=True))
+            self._notify(item_id, headphone)
+
+    def upsert_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """upsert() each (item_id, headphone) while holding the lock once."""
+        with self.lock:
+            for item_id, headphone in items:
+                self.upsert(item_id, headphone)
+
+    def remove(self, item_id: str) -> bool:
+        with self.lock:
+            if item_id not in self.items:
+                return False
+            del self.items[item_id]
+            del self.seqs[item_id]
+            self.score_layers.remove(item_id)
+            self.value_layers.remove(item_id)
+            self._notify(item_id, None)
+            return True
+
+    def rebuild(self) -> None:
+        """Recompute every vector, e.g. after the strategy registry changed."""
+        with self.lock:
+            self.score_layers = ParetoLayers(self.depth)
+            self.value_layers = ParetoLayers(self.depth)
+            for item_id, headphone in self.items.items():
+                seq = self.seqs[item_id]
+                self.score_layers.insert(item_id, seq, dominance_vector(headphone))
+                self.value_layers.insert(item_id, seq, dominance_vector(headphone, include_price=True))
+
+    def candidates(self, num_layers: int) -> Optional[List[str]]:
+        """Ids in the top `num_layers` score or value layers, None if untracked."""
+        score_ids = self.score_layers.members(num_layers)
+        value_ids = self.value_layers.members(num_layers)
+        if score_ids is None or value_ids is None:
+            return None
+        return list(score_ids | value_ids)
+
+    def rank(
+        self,
+        use_cases: List[UseCase],
+        top_k: int,
+        layers: Optional[int] = None,
+        prune: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        evaluate_headphones() over the catalog, truncated to top_k.
+        With pruning, only the top `layers` (default top_k) Pareto layers are
+        scored; the result is exact whenever layers >= top_k.
+        """
+        layers = layers or top_k
+        with self.lock:
+            ids = None
+            # Dominance only implies a higher blended score for non-negative mixes
+            if prune and all(uc.percentage >= 0 for uc in use_cases):
+                ids = self.candidates(layers)
+            pruned = ids is not None
+            if ids is None:
+                ids = list(self.items)
+
+            ids.sort(key=self.seqs.__getitem__)
+            headphones = [self.items[item_id] for item_id in ids]
+            size = len(self.items)
+
+        result = evaluate_headphones(headphones, use_cases)
+        result["ranked_headphones"] = result["ranked_headphones"][:top_k]
+        result["value_ranked_headphones"] = result["value_ranked_headphones"][:top_k]
+        result["catalog"] = {
+            "size": size,
+            "scored": len(ids),
+            "pruned": pruned,
+            "exact": not pruned or layers >= top_k,
+        }
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "size": len(self.items),
+                "depth": self.depth,
+                "score_layers": self.score_layers.layer_sizes(),
+                "score_overflow": len(self.score_layers.overflow),
+                "value_layers": self.value_layers.layer_sizes(),
+                "value_overflow": len(self.value_layers.overflow),
+            }
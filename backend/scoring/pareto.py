@@ -0,0 +1,181 @@
+"""
+Pareto-frontier (skyline) layers over per-use-case score vectors.
+
+The blended score in evaluate_headphones() is a non-negative combination of
+the per-use-case scores, so a headphone scoring >= another for every
+registered use case scores >= it for every use-case mix. Layer 1 holds the
+headphones nothing dominates, layer 2 those dominated only by layer 1, and
+so on. Any headphone below layer K has at least K headphones ranked ahead of
+it, so scoring layers 1..K yields the exact top K.
+
+Dominance also requires catalog order (earlier sequence number), matching the
+stable tie-break of evaluate_headphones(); equal rounded scores therefore
+never reorder a pruned result.
+
+The same argument applies to any headphone with K or more dominators, so
+members() also drops layer members dominated K times (the K-skyband). How
+much this prunes depends on the catalog: the more the use-case scores
+disagree with each other, the more headphones sit in the top layers, and a
+sizeable share of the catalog may still be scored.
+
+Layers and dominator counts are maintained incrementally: inserts push
+dominated members down, removals pull members up, and headphones deeper than
+`depth` layers are kept in an overflow set. Updating dominator counts scans
+every item, so each insert or removal is O(n).
+"""
+from operator import ge
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from scoring.scoring_logic import score_headphone_for_use_case
+from scoring.weight_profiles import known_use_cases
+
+Vector = Tuple[float, ...]
+
+
+def dominance_vector(headphone: Dict[str, Any], include_price: bool = False) -> Vector:
+    """
+    Score for every known use case (built-in or weight profile). With include_price, the negated
+    price is appended so dominance also implies a better-or-equal value score
+    (score per rupee).
+    """
+    vector = [score_headphone_for_use_case(headphone, name)[0] for name in sorted(known_use_cases())]
+    if include_price:
+        price = headphone.get('price', 1)
+        if price is None or price <= 0:
+            price = 1
+        vector.append(-price)
+    return tuple(vector)
+
+
+class ParetoLayers:
+    """Incrementally maintained skyline layers keyed by item id."""
+
+    def __init__(self, depth: int = 10):
+        self.depth = depth
+        self.layers: List[Set[str]] = []
+        self.overflow: Set[str] = set()
+        self.vectors: Dict[str, Vector] = {}
+        self.seqs: Dict[str, int] = {}
+        self.layer_index: Dict[str, int] = {}  # -1 for overflow
+        self.dominator_counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _dominates(self, a: str, b: str) -> bool:
+        if self.seqs[a] >= self.seqs[b]:
+            return False
+        return all(map(ge, self.vectors[a], self.vectors[b]))
+
+    def _dominated_by_layer(self, key: str, layer: Set[str]) -> bool:
+        return any(self._dominates(other, key) for other in layer)
+
+    def _place(self, key: str, layer_idx: int) -> None:
+        if layer_idx >= self.depth:
+            self.overflow.add(key)
+            self.layer_index[key] = -1
+            return
+        while len(self.layers) <= layer_idx:
+            self.layers.append(set())
+        self.layers[layer_idx].add(key)
+        self.layer_index[key] = layer_idx
+
+    def insert(self, key: str, seq: int, vector: Sequence[float]) -> None:
+        if key in self.vectors:
+            self.remove(key)
+        self.vectors[key] = tuple(vector)
+        self.seqs[key] = seq
+
+        vector = self.vectors[key]
+        count = 0
+        for other, other_vector in self.vectors.items():
+            if other == key:
+                continue
+            if self.seqs[other] < seq:
+                if all(map(ge, other_vector, vector)):
+                    count += 1
+            elif all(map(ge, vector, other_vector)):
+                self.dominator_counts[other] += 1
+        self.dominator_counts[key] = count
+
+        # First layer with no dominator; no deeper layer can hold one either
+        layer_idx = 0
+        while layer_idx < len(self.layers) and self._dominated_by_layer(key, self.layers[layer_idx]):
+            layer_idx += 1
+        self._place(key, layer_idx)
+        if layer_idx >= self.depth:
+            return
+
+        # Push members dominated by the new item down, cascading
+        pushed = {other for other in self.layers[layer_idx] if self._dominates(key, other)}
+        while pushed:
+            self.layers[layer_idx] -= pushed
+            layer_idx += 1
+            below = self.layers[layer_idx] if layer_idx < min(len(self.layers), self.depth) else set()
+            next_pushed = {
+                other for other in below
+                if any(self._dominates(moved, other) for moved in pushed)
+            }
+            for other in pushed:
+                self._place(other, layer_idx)
+            if layer_idx >= self.depth:
+                break
+            pushed = next_pushed
+
+    def remove(self, key: str) -> None:
+        if key not in self.vectors:
+            return
+        layer_idx = self.layer_index.pop(key)
+        if layer_idx == -1:
+            self.overflow.discard(key)
+        else:
+            self.layers[layer_idx].discard(key)
+            self._promote_from(layer_idx + 1)
+        for other in self.vectors:
+            if other != key and self._dominates(key, other):
+                self.dominator_counts[other] -= 1
+        del self.dominator_counts[key]
+        del self.vectors[key]
+        del self.seqs[key]
+        self._trim()
+
+    def _promote_from(self, layer_idx: int) -> None:
+        """Pull up members no longer dominated by the layer above, cascading."""
+        while layer_idx < len(self.layers):
+            above = self.layers[layer_idx - 1]
+            promoted = {key for key in self.layers[layer_idx] if not self._dominated_by_layer(key, above)}
+            if not promoted:
+                return
+            self.layers[layer_idx] -= promoted
+            for key in promoted:
+                self._place(key, layer_idx - 1)
+            layer_idx += 1
+
+        # Overflow only holds items once all `depth` layers exist
+        if layer_idx == self.depth and self.overflow:
+            above = self.layers[layer_idx - 1]
+            candidates = [key for key in self.overflow if not self._dominated_by_layer(key, above)]
+            for key in candidates:
+                if not any(self._dominates(other, key) for other in candidates):
+                    self.overflow.discard(key)
+                    self._place(key, layer_idx - 1)
+
+    def _trim(self) -> None:
+        while self.layers and not self.layers[-1]:
+            self.layers.pop()
+
+    def members(self, num_layers: int) -> Optional[Set[str]]:
+        """
+        Keys in layers 1..num_layers with fewer than num_layers dominators, or
+        None if that depth is not tracked (the caller must then score
+        everything).
+        """
+        if num_layers > self.depth:
+            return None
+        result: Set[str] = set()
+        for layer in self.layers[:num_layers]:
+            result.update(key for key in layer if self.dominator_counts[key] < num_layers)
+        return result
+
+    def layer_sizes(self) -> List[int]:
+        return [len(layer) for layer in self.layers]
@@ -0,0 +1,198 @@
+"""
+Use-case mix sensitivity sweep.
+
+The blended score in evaluate_headphones() is linear in the use-case
+percentages: FinalScore(mix) = Σ (percentage / 100 × use_case_score).
+Per-use-case scores are therefore computed once, and any number of mixes can
+be ranked from that small matrix without re-scoring a headphone.
+
+Ranking matches /evaluate exactly: scores are accumulated in use-case order,
+rounded to 3 decimals, and ties go to the earlier headphone.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Mix = Tuple[int, ...]
+
+
+def simplex_grid_size(num_use_cases: int, step: int) -> int:
+    """Number of mixes on the percentage simplex with the given step."""
+    return math.comb(100 // step + num_use_cases - 1, num_use_cases - 1)
+
+
+def blended_score(scores: Sequence[float], mix: Sequence[float]) -> float:
+    """Same accumulation as evaluate_headphones()."""
+    final_score = 0
+    for uc_score, percentage in zip(scores, mix):
+        final_score += uc_score * (percentage / 100)
+    return final_score
+
+
+def possible_winners(score_matrix: List[List[float]]) -> List[int]:
+    """
+    Indices of headphones that can rank first for some mix.
+    A headphone scoring <= an earlier one on every use case can never beat it
+    (the blend is monotone and ties go to the earlier headphone).
+    """
+    candidates = []
+    for idx, scores in enumerate(score_matrix):
+        dominated = any(
+            all(other <= mine for other, mine in zip(scores, score_matrix[prev]))
+            for prev in range(idx)
+        )
+        if not dominated:
+            candidates.append(idx)
+    return candidates
+
+
+def sweep_winners(
+    score_matrix: List[List[float]],
+    num_use_cases: int,
+    step: int,
+    candidates: Optional[List[int]] = None,
+) -> List[Tuple[Mix, int]]:
+    """
+    (mix, winner index) for every mix on the simplex grid.
+    Mixes are enumerated depth-first so partial sums over the leading use
+    cases are shared, and per-percentage contributions come from a table;
+    the floating-point operations are the same as blended_score()'s.
+    Cost is O(mixes × candidates); pass possible_winners() if already known.
+    """
+    if candidates is None:
+        candidates = possible_winners(score_matrix)
+    units = 100 // step
+    # terms[u][k][i]: candidate i's contribution for use case u at k * step percent
+    terms = [
+        [[score_matrix[idx][u] * ((k * step) / 100) for idx in candidates] for k in range(units + 1)]
+        for u in range(num_use_cases)
+    ]
+    last = num_use_cases - 1
+    mix = [0] * num_use_cases
+    grid: List[Tuple[Mix, int]] = []
+
+    def descend(u: int, remaining: int, partial: List[float]) -> None:
+        if u == last:
+            mix[u] = remaining * step
+            scores = [p + t for p, t in zip(partial, terms[u][remaining])]
+            best = round(max(scores), 3)
+            # Only scores within 0.001 of the maximum can round to the same
+            # value; the earliest of those wins, as in /evaluate
+            threshold = best - 0.001
+            for pos, score in enumerate(scores):
+                if score >= threshold and round(score, 3) == best:
+                    break
+            grid.append((tuple(mix), candidates[pos]))
+            return
+        for k in range(remaining, -1, -1):
+            mix[u] = k * step
+            descend(u + 1, remaining - k, [p + t for p, t in zip(partial, terms[u][k])])
+
+    descend(0, units, [0] * len(candidates))
+    return grid
+
+
+def summarize_regions(
+    grid: List[Tuple[Mix, int]],
+    names: List[str],
+    use_case_names: List[str],
+) -> List[Dict]:
+    """Per winning headphone: share of mixes won, percentage ranges and centroid."""
+    mixes_by_winner: Dict[int, List[Mix]] = {}
+    for mix, winner in grid:
+        mixes_by_winner.setdefault(winner, []).append(mix)
+
+    total = len(grid)
+    summary = []
+    for idx, mixes in sorted(mixes_by_winner.items(), key=lambda item: -len(item[1])):
+        columns = list(zip(*mixes))
+        summary.append({
+            "model": names[idx],
+            "mix_count": len(mixes),
+            "share": round(len(mixes) / total, 4),
+            "percentage_ranges": {
+                uc: [min(columns[u]), max(columns[u])]
+                for u, uc in enumerate(use_case_names)
+            },
+            "centroid": {
+                uc: round(sum(columns[u]) / len(mixes), 2)
+                for u, uc in enumerate(use_case_names)
+            },
+        })
+    return summary
+
+
+def _direction_mix(base_mix: Sequence[float], use_case: int, percentage: float) -> List[float]:
+    """
+    Mix with `use_case` set to `percentage` and the other use cases sharing
+    the remainder in their base proportions (equally if they are all zero).
+    """
+    others = [u for u in range(len(base_mix)) if u != use_case]
+    rest_total = sum(base_mix[u] for u in others)
+    mix = [0.0] * len(base_mix)
+    mix[use_case] = percentage
+    for u in others:
+        share = base_mix[u] / rest_total if rest_total else 1 / len(others)
+        mix[u] = (100 - percentage) * share
+    return mix
+
+
+def break_even_percentage(
+    leader: Sequence[float],
+    challenger: Sequence[float],
+    base_mix: Sequence[float],
+    use_case: int,
+) -> Optional[Tuple[float, bool]]:
+    """
+    Percentage of `use_case` (others rescaled proportionally) at which the
+    two headphones score the same, and whether the challenger leads above it.
+    None if they do not cross within 0-100.
+    """
+    if len(base_mix) < 2:
+        return None
+    diff_low, diff_high = (
+        blended_score(leader, mix) - blended_score(challenger, mix)
+        for mix in (_direction_mix(base_mix, use_case, 0), _direction_mix(base_mix, use_case, 100))
+    )
+    if diff_low == diff_high:
+        return None
+    # The difference is linear along this direction
+    t = diff_low / (diff_low - diff_high)
+    if not 0 <= t <= 1:
+        return None
+    return round(t * 100, 2), diff_high < diff_low
+
+
+def rank_for_mix(score_matrix: List[List[float]], mix: Sequence[float]) -> List[int]:
+    """All headphone indices in /evaluate order for one mix."""
+    return sorted(
+        range(len(score_matrix)),
+        key=lambda idx: -round(blended_score(score_matrix[idx], mix), 3),
+    )
+
+
+def break_even_points(
+    score_matrix: List[List[float]],
+    names: List[str],
+    use_case_names: List[str],
+    leader: int,
+    challengers: List[int],
+    base_mix: Sequence[float],
+) -> List[Dict]:
+    """Break-even percentages between the base-mix leader and each challenger."""
+    points = []
+    for challenger in challengers:
+        if challenger == leader:
+            continue
+        for u, uc in enumerate(use_case_names):
+            crossing = break_even_percentage(score_matrix[leader], score_matrix[challenger], base_mix, u)
+            if crossing is None:
+                continue
+            percentage, challenger_wins_above = crossing
+            points.append({
+                "leader": names[leader],
+                "challenger": names[challenger],
+                "use_case": uc,
+                "percentage": percentage,
+                "challenger_wins_above": challenger_wins_above,
+            })
+    return points
@@ -0,0 +1,223 @@
+"""
+Server-side comparison sessions.
+
+A session keeps each compared headphone's scored entry (specs, per-use-case
+scores, blended and value scores) and both rankings. Adding a product scores
+only that product and inserts it into ranked_headphones and
+value_ranked_headphones by binary search; removing one deletes it the same
+way. Orderings match evaluate_headphones() over the session's items in the
+order they were added.
+
+Sessions live in memory, least recently used first. Idle sessions expire, and
+the least recently used ones are evicted once the approximate size of all
+sessions exceeds the budget. A single session may hold at most
+COMPARISON_SESSION_MAX_ITEMS products and never more than the whole budget;
+adds that would exceed either are rejected.
+
+Configuration (environment):
+    COMPARISON_SESSION_MAX_BYTES   approximate memory budget for all sessions (default 32 MiB)
+    COMPARISON_SESSION_MAX_ITEMS   products per session (default 50)
+    COMPARISON_SESSION_TTL         idle seconds before a session expires (default 1800)
+"""
+import bisect
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.headphone import UseCase
+from pipeline import metrics
+from scoring.scoring_logic import ranking_explanation, score_headphone
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_ITEMS = 50
+DEFAULT_TTL = 1800
+
+
+class SessionLimitError(ValueError):
+    """Adding products would put a session over its limits; the message is user-facing."""
+
+
+class ComparisonSession:
+    def __init__(self, session_id: str, use_cases: List[UseCase]):
+        self.session_id = session_id
+        self.use_cases = use_cases
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.sources: Dict[str, Optional[str]] = {}
+        self.seqs: Dict[str, int] = {}
+        self.entry_bytes: Dict[str, int] = {}
+        self._next_seq = 0
+        # Sort keys kept alongside both rankings for bisection
+        self.ranked: List[Dict[str, Any]] = []
+        self._rank_keys: List[Tuple] = []
+        self.value_ranked: List[Dict[str, Any]] = []
+        self._value_keys: List[Tuple] = []
+        self.last_access = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(self.entry_bytes.values())
+
+    def _keys(self, item_id: str) -> Tuple[Tuple, Tuple]:
+        # evaluate_headphones(): score desc, then input order; value ranking is
+        # a stable sort of that, so value ties fall back to the score order
+        entry = self.entries[item_id]
+        seq = self.seqs[item_id]
+        return (-entry['score'], seq), (-entry['value_score'], -entry['score'], seq)
+
+    def add(self, headphone: Dict[str, Any], source: Optional[str] = None) -> str:
+        """Score one headphone and insert it into both rankings."""
+        item_id = uuid.uuid4().hex[:12]
+        seq = self._next_seq
+        self._next_seq += 1
+
+        entry = score_headphone(headphone, self.use_cases, seq)
+        entry["id"] = item_id
+        self.entries[item_id] = entry
+        self.sources[item_id] = source
+        self.seqs[item_id] = seq
+        self.entry_bytes[item_id] = len(json.dumps(entry, default=str))
+
+        rank_key, value_key = self._keys(item_id)
+        pos = bisect.bisect(self._rank_keys, rank_key)
+        self._rank_keys.insert(pos, rank_key)
+        self.ranked.insert(pos, entry)
+        pos = bisect.bisect(self._value_keys, value_key)
+        self._value_keys.insert(pos, value_key)
+        self.value_ranked.insert(pos, entry)
+        return item_id
+
+    def remove(self, item_id: str) -> bool:
+        if item_id not in self.entries:
+            return False
+        rank_key, value_key = self._keys(item_id)
+        pos = bisect.bisect_left(self._rank_keys, rank_key)
+        del self._rank_keys[pos], self.ranked[pos]
+        pos = bisect.bisect_left(self._value_keys, value_key)
+        del self._value_keys[pos], self.value_ranked[pos]
+
+        del self.entries[item_id], self.sources[item_id], self.seqs[item_id], self.entry_bytes[item_id]
+        return True
+
+    def result(self) -> Dict[str, Any]:
+        """Same shape as evaluate_headphones(), plus the session's items."""
+        return {
+            "session_id": self.session_id,
+            "items": [
+                {"id": item_id, "model": entry["model"], "url": self.sources[item_id]}
+                for item_id, entry in self.entries.items()
+            ],
+            "ranked_headphones": list(self.ranked),
+            "value_ranked_headphones": list(self.value_ranked),
+            "explanation": ranking_explanation(self.use_cases),
+        }
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name) or default)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+class SessionStore:
+    """Comparison sessions in least-recently-used order."""
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_items: Optional[int] = None,
+    ):
+        self.max_bytes = max_bytes or _env_int("COMPARISON_SESSION_MAX_BYTES", DEFAULT_MAX_BYTES)
+        self.max_items = max_items or _env_int("COMPARISON_SESSION_MAX_ITEMS", DEFAULT_MAX_ITEMS)
+        self.ttl = ttl or _env_int("COMPARISON_SESSION_TTL", DEFAULT_TTL)
+        self.sessions: "OrderedDict[str, ComparisonSession]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.last_access > cutoff:
+                break
+            del self.sessions[session.session_id]
+            metrics.increment("sessions.expired")
+
+    def _touch(self, session: ComparisonSession) -> None:
+        session.last_access = time.monotonic()
+        self.sessions.move_to_end(session.session_id)
+
+    def create(self, use_cases: List[UseCase]) -> ComparisonSession:
+        self._expire()
+        session = ComparisonSession(uuid.uuid4().hex, use_cases)
+        self.sessions[session.session_id] = session
+        self._update_gauges()
+        return session
+
+    def get(self, session_id: str) -> Optional[ComparisonSession]:
+        self._expire()
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self._touch(session)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        removed = self.sessions.pop(session_id, None) is not None
+        self._update_gauges()
+        return removed
+
+    def check_room(self, session: Optional[ComparisonSession], count: int) -> None:
+        """Raise SessionLimitError if `count` more products would not fit (session None: a new one)."""
+        current = len(session) if session is not None else 0
+        if current + count > self.max_items:
+            raise SessionLimitError(
+                f"A comparison session holds at most {self.max_items} products "
+                f"({current} already added, {count} requested)."
+            )
+
+    def add_items(
+        self,
+        session: ComparisonSession,
+        products: List[Tuple[Optional[str], Dict[str, Any]]],
+    ) -> List[str]:
+        """
+        Add (source, headphone) pairs to a session, all or none; raises
+        SessionLimitError when they would exceed the item cap or the session
+        alone would exceed the memory budget.
+        """
+        self.check_room(session, len(products))
+        added = [session.add(headphone, source=source) for source, headphone in products]
+        if session.size_bytes > self.max_bytes:
+            for item_id in added:
+                session.remove(item_id)
+            metrics.increment("sessions.rejected")
+            raise SessionLimitError("These products would exceed the comparison session memory budget.")
+        self.enforce_budget()
+        return added
+
+    def enforce_budget(self) -> None:
+        """
+        Evict least recently used sessions (never the most recent) until within
+        budget; add_items() keeps any single session within it.
+        """
+        total = sum(session.size_bytes for session in self.sessions.values())
+        while total > self.max_bytes and len(self.sessions) > 1:
+            _, evicted = self.sessions.popitem(last=False)
+            total -= evicted.size_bytes
+            metrics.increment("sessions.evicted")
+        self._update_gauges(total)
+
+    def _update_gauges(self, total: Optional[int] = None) -> None:
+        if total is None:
+            total = sum(session.size_bytes for session in self.sessions.values())
+        metrics.set_gauge("sessions.count", len(self.sessions))
+        metrics.set_gauge("sessions.bytes", total)
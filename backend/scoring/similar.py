@@ -0,0 +1,243 @@
+"""
+Nearest-neighbour index for "similar headphones" suggestions.
+
+Headphones are points in normalize_specs() space (price excluded, so it can
+be used as a constraint instead), partitioned by device type. Each partition
+holds a KD-tree: inserted or updated items are added as new leaves and
+replaced or removed items are tombstoned. Once the changes since the last
+build outgrow a fraction of the tree, only that partition's tree is rebuilt
+(balanced, without tombstones).
+
+Searches are exact: constraints (price, per-use-case minimum scores) are
+applied while walking the tree, so the k nearest matching items are
+returned rather than the k nearest filtered afterwards.
+"""
+import heapq
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from scoring.scoring_logic import normalize_specs, score_headphone_for_use_case
+
+# Spec axes of the similarity space
+SIMILARITY_SPECS = ('latency', 'num_mics', 'battery_life', 'water_resistance', 'driver_size')
+
+# Rebuild a partition's tree once changes since the last build exceed this share of it
+REBUILD_FRACTION = 0.25
+# ... but never for fewer changes than this
+REBUILD_MIN_CHANGES = 32
+
+Vector = Tuple[float, ...]
+Predicate = Callable[[str], bool]
+
+
+def spec_vector(headphone: Dict[str, Any]) -> Vector:
+    normalized = normalize_specs(headphone)
+    return tuple(float(normalized[spec]) for spec in SIMILARITY_SPECS)
+
+
+def partition_key(headphone: Dict[str, Any]) -> str:
+    return (headphone.get('device_type') or '').strip().lower()
+
+
+class _KDNode:
+    __slots__ = ('key', 'point', 'axis', 'left', 'right', 'removed')
+
+    def __init__(self, key: str, point: Vector, axis: int):
+        self.key = key
+        self.point = point
+        self.axis = axis
+        self.left: Optional['_KDNode'] = None
+        self.right: Optional['_KDNode'] = None
+        self.removed = False
+
+
+def _build_tree(entries: List[Tuple[str, Vector]], depth: int = 0) -> Optional[_KDNode]:
+    if not entries:
+        return None
+    axis = depth % len(entries[0][1])
+    entries.sort(key=lambda entry: entry[1][axis])
+    mid = len(entries) // 2
+    node = _KDNode(entries[mid][0], entries[mid][1], axis)
+    node.left = _build_tree(entries[:mid], depth + 1)
+    node.right = _build_tree(entries[mid + 1:], depth + 1)
+    return node
+
+
+def _squared_distance(a: Vector, b: Vector) -> float:
+    return sum((x - y) ** 2 for x, y in zip(a, b))
+
+
+class _Neighbours:
+    """Bounded max-heap of the k best (distance, key) pairs seen so far."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap: List[Tuple[float, str]] = []
+
+    def bound(self) -> float:
+        return -self.heap[0][0] if len(self.heap) >= self.k else math.inf
+
+    def offer(self, dist: float, key: str) -> None:
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (-dist, key))
+        elif dist < -self.heap[0][0]:
+            heapq.heapreplace(self.heap, (-dist, key))
+
+    def sorted(self) -> List[Tuple[float, str]]:
+        return sorted((-neg, key) for neg, key in self.heap)
+
+
+class _Partition:
+    def __init__(self):
+        self.root: Optional[_KDNode] = None
+        self.nodes: Dict[str, _KDNode] = {}
+        self.built_size = 0
+        self.changes = 0
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def upsert(self, key: str, vector: Vector) -> None:
+        self._discard(key)
+        if self.root is None:
+            node = self.root = _KDNode(key, vector, 0)
+        else:
+            parent = self.root
+            while True:
+                side = 'left' if vector[parent.axis] < parent.point[parent.axis] else 'right'
+                child = getattr(parent, side)
+                if child is None:
+                    node = _KDNode(key, vector, (parent.axis + 1) % len(vector))
+                    setattr(parent, side, node)
+                    break
+                parent = child
+        self.nodes[key] = node
+        self.changes += 1
+        self._maybe_rebuild()
+
+    def remove(self, key: str) -> None:
+        if self._discard(key):
+            self.changes += 1
+            self._maybe_rebuild()
+
+    def _discard(self, key: str) -> bool:
+        node = self.nodes.pop(key, None)
+        if node is None:
+            return False
+        node.removed = True
+        return True
+
+    def _maybe_rebuild(self) -> None:
+        if self.changes >= max(REBUILD_MIN_CHANGES, REBUILD_FRACTION * self.built_size):
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        self.root = _build_tree([(key, node.point) for key, node in self.nodes.items()])
+        self.nodes = {}
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            self.nodes[node.key] = node
+            stack.extend(child for child in (node.left, node.right) if child is not None)
+        self.built_size = len(self.nodes)
+        self.changes = 0
+
+    def search(self, point: Vector, neighbours: _Neighbours, accept: Predicate) -> None:
+        # (node, lower bound of squared distances in its subtree)
+        stack = [(self.root, 0.0)] if self.root else []
+        while stack:
+            node, lower_bound = stack.pop()
+            if lower_bound >= neighbours.bound():
+                continue
+            if not node.removed:
+                dist = _squared_distance(point, node.point)
+                if dist < neighbours.bound() and accept(node.key):
+                    neighbours.offer(dist, node.key)
+
+            diff = point[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            # Far side pushed first, so it is checked after the near side tightened the bound
+            if far is not None:
+                stack.append((far, max(lower_bound, diff * diff)))
+            if near is not None:
+                stack.append((near, lower_bound))
+
+
+class SimilarityIndex:
+    """Per-device-type KD-trees over catalog items, kept in sync via update()."""
+
+    def __init__(self):
+        self.partitions: Dict[str, _Partition] = {}
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.item_partition: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def update(self, item_id: str, headphone: Optional[Dict[str, Any]]) -> None:
+        """Catalog listener: insert/replace an item, or remove it when headphone is None."""
+        old_partition = self.item_partition.pop(item_id, None)
+        if old_partition is not None:
+            self.partitions[old_partition].remove(item_id)
+            if not self.partitions[old_partition]:
+                del self.partitions[old_partition]
+        self.items.pop(item_id, None)
+        if headphone is None:
+            return
+
+        partition = partition_key(headphone)
+        self.partitions.setdefault(partition, _Partition()).upsert(item_id, spec_vector(headphone))
+        self.item_partition[item_id] = partition
+        self.items[item_id] = headphone
+
+    def nearest(
+        self,
+        headphone: Dict[str, Any],
+        k: int,
+        same_device_type: bool = True,
+        max_price: Optional[float] = None,
+        below_price: Optional[float] = None,
+        min_scores: Optional[Dict[str, float]] = None,
+        exclude: Sequence[str] = (),
+    ) -> List[Tuple[float, str]]:
+        """
+        (distance, item id) of the k items nearest to `headphone` that satisfy
+        the constraints, nearest first.
+        """
+        excluded = set(exclude)
+        min_scores = min_scores or {}
+
+        def accept(key: str) -> bool:
+            if key in excluded:
+                return False
+            item = self.items[key]
+            price = item.get('price')
+            if max_price is not None and (price is None or price > max_price):
+                return False
+            if below_price is not None and (price is None or price >= below_price):
+                return False
+            return all(
+                score_headphone_for_use_case(item, use_case)[0] >= min_score
+                for use_case, min_score in min_scores.items()
+            )
+
+        if same_device_type:
+            partition = self.partitions.get(partition_key(headphone))
+            partitions = [partition] if partition else []
+        else:
+            partitions = list(self.partitions.values())
+
+        point = spec_vector(headphone)
+        neighbours = _Neighbours(k)
+        for partition in partitions:
+            partition.search(point, neighbours, accept)
+        return [(math.sqrt(dist), key) for dist, key in neighbours.sorted()]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "size": len(partition),
+                "changes_since_rebuild": partition.changes,
+            }
+            for name, partition in sorted(self.partitions.items())
+        }
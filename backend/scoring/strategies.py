@@ -225,6 +225,18 @@ STRATEGIES = {
 }
 
 
+# Lookup for user-defined weight profiles (installed by scoring/weight_profiles.py)
+_profile_lookup = None
+
+
+def set_profile_lookup(lookup) -> None:
+    global _profile_lookup
+    _profile_lookup = lookup
+
+
 def get_strategy(use_case_name: str) -> BaseStrategy:
-    """Get strategy for a use case name"""
-    return STRATEGIES.get(use_case_name, BaseStrategy())
+    """Get strategy for a use case name (built-in or registered weight profile)"""
+    strategy = STRATEGIES.get(use_case_name)
+    if strategy is None and _profile_lookup is not None:
+        strategy = _profile_lookup(use_case_name)
+    return strategy or BaseStrategy()
@@ -0,0 +1,44 @@
+"""
+Startup warm-up for scoring.
+
+Runs the full scoring path once for every known use case so registered
+profile kernels are compiled and first-call costs (strategy lookups, spec
+normalization branches, pydantic model setup) are paid before the first
+request instead of during it.
+"""
+from models.headphone import UseCase, UserRequest
+from scoring.scoring_logic import evaluate_headphones
+from scoring.weight_profiles import known_use_cases
+
+# One wired and one wireless headphone cover the device-type branches
+WARMUP_HEADPHONES = [
+    {
+        "name": "Warm-up wired",
+        "price": 1500,
+        "battery_life": None,
+        "latency": 0,
+        "num_mics": 1,
+        "device_type": "wired",
+        "water_resistance": 0.0,
+        "driver_size": 40,
+    },
+    {
+        "name": "Warm-up wireless",
+        "price": 3000,
+        "battery_life": 30,
+        "latency": 80,
+        "num_mics": 4,
+        "device_type": "wireless",
+        "water_resistance": "IPX5",
+        "driver_size": 10,
+    },
+]
+
+
+def warm_scoring() -> None:
+    names = known_use_cases()
+    request = UserRequest(
+        headphones=WARMUP_HEADPHONES,
+        use_cases=[UseCase(name=name, percentage=100 / len(names)) for name in names],
+    )
+    evaluate_headphones([h.dict() for h in request.headphones], request.use_cases)
@@ -1,7 +1,274 @@
-use_case_weights = {
-    'gaming': {'latency': 0.7, 'num_mics': 0.3},
-    'gym': {'water_resistance': 0.6, 'comfort_score': 0.4},
-    'work_calls': {'num_mics': 0.8, 'comfort_score': 0.2},
-    'travel': {'anc_strength': 0.5, 'battery_life': 0.5},
-    'casual_music': {'comfort_score': 0.5, 'latency': 0.5}
+"""
+User-defined weight profiles.
+
+A profile is a use case defined by data instead of a strategy class: spec
+weights plus ordered adjustment rules (see models/weight_profile.py). Each
+profile is validated and compiled once into a strategy object (the scoring
+kernel) that score_headphone_for_use_case() uses exactly like a built-in
+strategy. Kernels are cached by a hash of the profile's content, so the same
+weights and rules registered under several names compile once, and an LRU
+caps how many stay compiled; evicted kernels are recompiled on next use.
+Kernels are plain closures over the validated rule values; no source code is
+generated from request data.
+
+Configuration (environment):
+    WEIGHT_PROFILE_CACHE_SIZE   compiled profiles kept (default 64)
+    WEIGHT_PROFILE_MAX_COUNT    registered profiles allowed (default 32)
+"""
+import hashlib
+import json
+import math
+import operator
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models.weight_profile import AdjustmentRule, WeightProfile
+from pipeline import metrics
+from pipeline.parsing import parse_price_value
+from scoring.strategies import STRATEGIES, BaseStrategy, set_profile_lookup
+
+DEFAULT_CACHE_SIZE = 64
+DEFAULT_MAX_PROFILES = 32
+
+# Specs a profile can weight or adjust (normalize_specs() keys)
+PROFILE_SPECS = ('latency', 'num_mics', 'battery_life', 'water_resistance', 'price', 'device_type', 'driver_size')
+
+NUMERIC_OPS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
 }
+
+# (parsed numbers, lowercased texts) of the raw specs a profile tests
+Condition = Callable[[Dict[str, Optional[float]], Dict[str, str]], bool]
+# current score -> adjusted score
+Action = Callable[[float], float]
+
+
+class ProfileError(ValueError):
+    """A profile that cannot be compiled; the message is user-facing."""
+
+
+class CompiledProfile(BaseStrategy):
+    """Scoring kernel for one profile: weights plus precompiled adjustment rules."""
+
+    def __init__(
+        self,
+        digest: str,
+        weights: Dict[str, float],
+        numeric_fields: Tuple[str, ...],
+        text_fields: Tuple[str, ...],
+        rules: List[Tuple[str, List[Tuple[Condition, Action]]]],
+    ):
+        self.digest = digest
+        self.weights = weights
+        self.numeric_fields = numeric_fields
+        self.text_fields = text_fields
+        # (spec, [(condition, action), ...]) with branches in rule order
+        self.rules = rules
+
+    def adjust_scores(self, normalized_scores, raw_specs):
+        numbers = {field: _number(raw_specs.get(field)) for field in self.numeric_fields}
+        texts = {field: _text(raw_specs.get(field)) for field in self.text_fields}
+        adjusted = normalized_scores.copy()
+        for spec, branches in self.rules:
+            for condition, action in branches:
+                if condition(numbers, texts):
+                    adjusted[spec] = action(adjusted.get(spec, 0))
+                    break
+        return adjusted
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return value
+    return parse_price_value(value)
+
+
+def _text(value: Any) -> str:
+    return str(value or '').lower()
+
+
+def profile_digest(profile: WeightProfile) -> str:
+    """Content hash of weights and rules (the name is not part of it)."""
+    content = {
+        "weights": dict(sorted(profile.weights.items())),
+        "rules": [rule.dict() for rule in profile.rules],
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _check_number(value: Optional[float], label: str) -> None:
+    if value is not None and (not math.isfinite(value) or value < 0):
+        raise ProfileError(f"{label} must be a non-negative number")
+
+
+def _condition(rule: AdjustmentRule) -> Tuple[Condition, Optional[str], Optional[str]]:
+    """(condition, numeric field, text field) for a rule; fields it needs parsed."""
+    field = rule.field or rule.spec
+    if rule.op == 'always':
+        return (lambda numbers, texts: True), None, None
+
+    if rule.op in ('contains', 'not_contains'):
+        # A numeric value (e.g. "value": 2) matches as written, not as "2.0"
+        needle = rule.value.lower() if isinstance(rule.value, str) else f"{rule.value:g}"
+        if rule.op == 'contains':
+            return (lambda numbers, texts: needle in texts[field]), None, field
+        return (lambda numbers, texts: needle not in texts[field]), None, field
+
+    threshold = parse_price_value(rule.value)
+    if threshold is None or not math.isfinite(threshold):
+        raise ProfileError(f"rule on '{rule.spec}': op '{rule.op}' needs a numeric value")
+    compare = NUMERIC_OPS[rule.op]
+
+    def condition(numbers, texts):
+        number = numbers[field]
+        return number is not None and compare(number, threshold)
+    return condition, field, None
+
+
+def _action(rule: AdjustmentRule) -> Action:
+    if rule.set is not None:
+        value = rule.set
+        return lambda current: value
+    factor, cap = rule.multiply, rule.max
+    if cap is None:
+        return lambda current: current * factor
+    return lambda current: min(cap, current * factor)
+
+
+def compile_profile(profile: WeightProfile, digest: Optional[str] = None) -> CompiledProfile:
+    """
+    Validate a profile and build its kernel; raises ProfileError.
+    Each rule becomes a (condition, action) pair, grouped per spec in rule
+    order, so a profile adjusts scores the way a hand-written strategy's
+    if/elif chains do. Raw specs a rule tests are parsed once per call.
+    """
+    if not profile.weights:
+        raise ProfileError("weights must not be empty")
+    for spec, weight in profile.weights.items():
+        if spec not in PROFILE_SPECS:
+            raise ProfileError(f"unknown spec '{spec}' (known: {', '.join(PROFILE_SPECS)})")
+        _check_number(weight, f"weight for '{spec}'")
+    if sum(profile.weights.values()) <= 0:
+        raise ProfileError("at least one weight must be positive")
+
+    numeric_fields = set()
+    text_fields = set()
+    branches: Dict[str, List[Tuple[Condition, Action]]] = {}
+    for rule in profile.rules:
+        if rule.spec not in PROFILE_SPECS:
+            raise ProfileError(f"rule adjusts unknown spec '{rule.spec}'")
+        if rule.field is not None and rule.field not in PROFILE_SPECS:
+            raise ProfileError(f"rule tests unknown field '{rule.field}'")
+        if rule.op not in tuple(NUMERIC_OPS) + ('contains', 'not_contains', 'always'):
+            raise ProfileError(f"unknown op '{rule.op}'")
+        for label, value in (("set", rule.set), ("multiply", rule.multiply), ("max", rule.max)):
+            _check_number(value, f"rule on '{rule.spec}': {label}")
+
+        condition, numeric_field, text_field = _condition(rule)
+        if numeric_field:
+            numeric_fields.add(numeric_field)
+        if text_field:
+            text_fields.add(text_field)
+        branches.setdefault(rule.spec, []).append((condition, _action(rule)))
+
+    return CompiledProfile(
+        digest or profile_digest(profile),
+        dict(profile.weights),
+        tuple(sorted(numeric_fields)),
+        tuple(sorted(text_fields)),
+        list(branches.items()),
+    )
+
+
+class ProfileRegistry:
+    """Registered profiles by name and an LRU of compiled kernels by digest."""
+
+    def __init__(self, cache_size: Optional[int] = None, max_profiles: Optional[int] = None):
+        try:
+            self.cache_size = cache_size or int(os.getenv("WEIGHT_PROFILE_CACHE_SIZE") or DEFAULT_CACHE_SIZE)
+        except ValueError:
+            self.cache_size = DEFAULT_CACHE_SIZE
+        try:
+            self.max_profiles = max_profiles or int(os.getenv("WEIGHT_PROFILE_MAX_COUNT") or DEFAULT_MAX_PROFILES)
+        except ValueError:
+            self.max_profiles = DEFAULT_MAX_PROFILES
+        # Kernels are looked up from request threads as well as the event loop
+        self._lock = threading.Lock()
+        self.profiles: Dict[str, Tuple[str, WeightProfile]] = {}
+        self.kernels: "OrderedDict[str, CompiledProfile]" = OrderedDict()
+        # Built-in use cases followed by profile names, refreshed on change
+        self.use_case_names: Tuple[str, ...] = tuple(STRATEGIES)
+
+    def _kernel(self, digest: str, profile: WeightProfile) -> CompiledProfile:
+        with self._lock:
+            kernel = self.kernels.get(digest)
+            if kernel is not None:
+                self.kernels.move_to_end(digest)
+                return kernel
+
+            metrics.increment("profiles.compiled")
+            kernel = self.kernels[digest] = compile_profile(profile, digest)
+            while len(self.kernels) > self.cache_size:
+                self.kernels.popitem(last=False)
+                metrics.increment("profiles.evicted")
+            return kernel
+
+    def register(self, profile: WeightProfile) -> str:
+        """Validate, compile and register a profile; returns its digest."""
+        if profile.name in STRATEGIES:
+            raise ProfileError(f"'{profile.name}' is a built-in use case")
+        if profile.name not in self.profiles and len(self.profiles) >= self.max_profiles:
+            raise ProfileError(f"at most {self.max_profiles} profiles can be registered")
+        digest = profile_digest(profile)
+        self._kernel(digest, profile)
+        self.profiles[profile.name] = (digest, profile)
+        self.use_case_names = tuple(STRATEGIES) + tuple(self.names())
+        return digest
+
+    def unregister(self, name: str) -> bool:
+        removed = self.profiles.pop(name, None) is not None
+        self.use_case_names = tuple(STRATEGIES) + tuple(self.names())
+        return removed
+
+    def get(self, name: str) -> Optional[CompiledProfile]:
+        entry = self.profiles.get(name)
+        if entry is None:
+            return None
+        return self._kernel(*entry)
+
+    def names(self) -> List[str]:
+        return sorted(self.profiles)
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": name,
+                "digest": digest,
+                "compiled": digest in self.kernels,
+                "weights": profile.weights,
+                "rules": [rule.dict(exclude_none=True) for rule in profile.rules],
+            }
+            for name, (digest, profile) in sorted(self.profiles.items())
+        ]
+
+
+profile_registry = ProfileRegistry()
+
+
+def get_profile_strategy(name: str) -> Optional[BaseStrategy]:
+    return profile_registry.get(name)
+
+
+set_profile_lookup(get_profile_strategy)
+
+
+def known_use_cases() -> Tuple[str, ...]:
+    """Built-in use cases followed by registered profiles."""
+    return profile_registry.use_case_names